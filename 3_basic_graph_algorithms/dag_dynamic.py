@@ -0,0 +1,97 @@
+from dag_report import DAG, CycleError, Edge
+
+
+class DynamicDAG:
+    """DAG with edge insertions and removals, the topological order is kept up to date (Pearce-Kelly).
+
+    An insertion that agrees with the current order costs O(1). Otherwise only the vertices between the two
+    endpoints in the order are searched and reordered, so the cost depends on the affected region, not on V + E.
+    """
+
+    def __init__(self, vertex_count: int):
+        self.vertex_count = vertex_count
+        self.successors = [set() for _ in range(vertex_count)]
+        self.predecessors = [set() for _ in range(vertex_count)]
+        self.order = list(range(vertex_count))  # order[position] - vertex
+        self.position = list(range(vertex_count))  # position[vertex] - index in order
+
+    @classmethod
+    def from_dag(cls, dag: DAG) -> "DynamicDAG":
+        dynamic_dag = cls(dag.vertex_count)
+        dynamic_dag.order = dag.topological_sort_kahn()
+        for position, vertex in enumerate(dynamic_dag.order):
+            dynamic_dag.position[vertex] = position
+        for v1, v2 in zip(dag.edge_sources.tolist(), dag.edge_targets.tolist()):
+            dynamic_dag.successors[v1].add(v2)
+            dynamic_dag.predecessors[v2].add(v1)
+        return dynamic_dag
+
+    @property
+    def edge_list_representation(self) -> list[Edge]:
+        return [Edge(v1, v2) for v1 in range(self.vertex_count) for v2 in self.successors[v1]]
+
+    def topological_order(self) -> list:
+        return list(self.order)
+
+    def has_edge(self, v1: int, v2: int) -> bool:
+        return v2 in self.successors[v1]
+
+    def add_edge(self, v1: int, v2: int):
+        """Raises CycleError and leaves the graph unchanged when the edge would close a cycle"""
+        if v1 == v2:
+            raise CycleError([v1])
+        if v2 in self.successors[v1]:
+            return
+        lower_bound = self.position[v2]
+        upper_bound = self.position[v1]
+        if lower_bound < upper_bound:
+            forward = self._search_forward(v2, v1, upper_bound)
+            backward = self._search_backward(v1, lower_bound)
+            self._reorder(forward, backward)
+        self.successors[v1].add(v2)
+        self.predecessors[v2].add(v1)
+
+    def remove_edge(self, v1: int, v2: int):
+        """The current order stays valid, so nothing has to be moved"""
+        if v2 not in self.successors[v1]:
+            raise KeyError(Edge(v1, v2))
+        self.successors[v1].remove(v2)
+        self.predecessors[v2].remove(v1)
+
+    def _search_forward(self, start: int, cycle_vertex: int, upper_bound: int) -> list:
+        """Vertices reachable from start without leaving positions <= upper_bound"""
+        parent = {start: None}
+        stack = [start]
+        while stack:
+            vertex = stack.pop()
+            for ascendant in self.successors[vertex]:
+                if ascendant == cycle_vertex:
+                    cycle = [vertex]
+                    while parent[cycle[-1]] is not None:
+                        cycle.append(parent[cycle[-1]])
+                    raise CycleError([cycle_vertex] + cycle[::-1])
+                if ascendant not in parent and self.position[ascendant] < upper_bound:
+                    parent[ascendant] = vertex
+                    stack.append(ascendant)
+        return list(parent)
+
+    def _search_backward(self, start: int, lower_bound: int) -> list:
+        """Vertices reaching start without leaving positions >= lower_bound"""
+        visited = {start}
+        stack = [start]
+        while stack:
+            vertex = stack.pop()
+            for precedent in self.predecessors[vertex]:
+                if precedent not in visited and self.position[precedent] > lower_bound:
+                    visited.add(precedent)
+                    stack.append(precedent)
+        return list(visited)
+
+    def _reorder(self, forward: list, backward: list):
+        """Backward vertices take the lowest freed positions, forward vertices the rest, both keep their order"""
+        forward.sort(key=self.position.__getitem__)
+        backward.sort(key=self.position.__getitem__)
+        positions = sorted(self.position[vertex] for vertex in forward + backward)
+        for position, vertex in zip(positions, backward + forward):
+            self.order[position] = vertex
+            self.position[vertex] = position
@@ -0,0 +1,130 @@
+import numpy as np
+
+from dag_report import DAG
+
+MAX_BITSET_BYTES = 1 << 30
+INTERVAL_LABEL_COUNT = 4
+
+
+class BitsetReachabilityIndex:
+    """Transitive closure as packed bit rows, row v has bit w set when w is reachable from v (v included).
+
+    O(V * E / 8) to build in reverse topological order, O(V^2 / 8) memory, O(1) queries.
+    """
+
+    def __init__(self, dag: DAG):
+        self.vertex_count = dag.vertex_count
+        offsets, targets = dag.csr_representation
+        row_bytes = (dag.vertex_count + 7) // 8
+        self.rows = np.zeros((dag.vertex_count, row_bytes), dtype=np.uint8)
+
+        for vertex in reversed(dag.topological_sort_kahn()):
+            ascendants = targets[offsets[vertex]:offsets[vertex + 1]]
+            row = self.rows[vertex]
+            if len(ascendants):
+                np.bitwise_or.reduce(self.rows[ascendants], axis=0, out=row)
+            row[vertex >> 3] |= np.uint8(1 << (vertex & 7))
+
+    def is_reachable(self, u: int, v: int) -> bool:
+        return bool((self.rows[u, v >> 3] >> (v & 7)) & 1)
+
+    def are_reachable(self, us, vs) -> np.ndarray:
+        us = np.asarray(us)
+        vs = np.asarray(vs)
+        return ((self.rows[us, vs >> 3] >> (vs & 7).astype(np.uint8)) & 1).astype(bool)
+
+
+class IntervalReachabilityIndex:
+    """Memory-bounded fallback: interval labels from several randomized DFS traversals (GRAIL).
+
+    If v is reachable from u, then every interval of v lies inside the matching interval of u.
+    Most negative queries are answered by the labels alone, the rest by a DFS pruned with them.
+    O(k * (V + E)) to build, O(k * V) memory.
+    """
+
+    def __init__(self, dag: DAG, label_count: int = INTERVAL_LABEL_COUNT, seed: int | None = None):
+        self.vertex_count = dag.vertex_count
+        offsets, targets = dag.csr_representation
+        self.offsets = offsets.tolist()
+        self.targets = targets.tolist()
+        rng = np.random.default_rng(seed)
+
+        # low[v] - smallest post-order rank below v, post[v] - post-order rank of v
+        self.low = np.zeros((label_count, dag.vertex_count), dtype=np.int64)
+        self.post = np.zeros((label_count, dag.vertex_count), dtype=np.int64)
+        for label in range(label_count):
+            self._label(rng, self.low[label], self.post[label])
+        self.low_rows = self.low.T.copy()
+        self.post_rows = self.post.T.copy()
+
+    def _label(self, rng: np.random.Generator, low: np.ndarray, post: np.ndarray):
+        """Iterative DFS from every root in a random order, successors also visited in a random order"""
+        visited = bytearray(self.vertex_count)
+        rank = 0
+        low_list = [0] * self.vertex_count
+        post_list = [0] * self.vertex_count
+        for root in rng.permutation(self.vertex_count).tolist():
+            if visited[root]:
+                continue
+            visited[root] = True
+            stack = [(root, iter(self._shuffled_ascendants(rng, root)))]
+            while stack:
+                vertex, ascendants = stack[-1]
+                for ascendant in ascendants:
+                    if not visited[ascendant]:
+                        visited[ascendant] = True
+                        stack.append((ascendant, iter(self._shuffled_ascendants(rng, ascendant))))
+                        break
+                else:
+                    stack.pop()
+                    vertex_low = rank
+                    for ascendant in self.targets[self.offsets[vertex]:self.offsets[vertex + 1]]:
+                        vertex_low = min(vertex_low, low_list[ascendant])
+                    low_list[vertex] = vertex_low
+                    post_list[vertex] = rank
+                    rank += 1
+        low[:] = low_list
+        post[:] = post_list
+
+    def _shuffled_ascendants(self, rng: np.random.Generator, vertex: int) -> list:
+        ascendants = self.targets[self.offsets[vertex]:self.offsets[vertex + 1]]
+        return [ascendants[i] for i in rng.permutation(len(ascendants)).tolist()]
+
+    def _may_reach(self, u: int, v: int) -> bool:
+        return bool(np.all(self.low_rows[u] <= self.low_rows[v]) and np.all(self.post_rows[v] <= self.post_rows[u]))
+
+    def is_reachable(self, u: int, v: int) -> bool:
+        if u == v:
+            return True
+        if not self._may_reach(u, v):
+            return False
+        visited = {u}
+        stack = [u]
+        while stack:
+            vertex = stack.pop()
+            for ascendant in self.targets[self.offsets[vertex]:self.offsets[vertex + 1]]:
+                if ascendant == v:
+                    return True
+                if ascendant not in visited and self._may_reach(ascendant, v):
+                    visited.add(ascendant)
+                    stack.append(ascendant)
+        return False
+
+    def are_reachable(self, us, vs) -> np.ndarray:
+        us = np.asarray(us)
+        vs = np.asarray(vs)
+        # Label filter for the whole batch at once, only the candidates are searched
+        candidates = np.all(self.low_rows[us] <= self.low_rows[vs], axis=1) & np.all(
+            self.post_rows[vs] <= self.post_rows[us], axis=1
+        )
+        result = np.zeros(len(us), dtype=bool)
+        for i in np.flatnonzero(candidates).tolist():
+            result[i] = self.is_reachable(int(us[i]), int(vs[i]))
+        return result
+
+
+def build_reachability_index(dag: DAG, max_bitset_bytes: int = MAX_BITSET_BYTES):
+    """Bitset closure when V^2 bits fit in max_bitset_bytes, interval labels otherwise"""
+    if dag.vertex_count * ((dag.vertex_count + 7) // 8) <= max_bitset_bytes:
+        return BitsetReachabilityIndex(dag)
+    return IntervalReachabilityIndex(dag)
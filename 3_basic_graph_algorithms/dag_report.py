@@ -1,80 +1,145 @@
-import random
 from collections import deque, namedtuple
+from functools import cached_property
 
 import numpy as np
 
 Edge = namedtuple("Edge", "v1 v2")
 
 
+class CycleError(ValueError):
+    def __init__(self, cycle: list):
+        super().__init__(f"Graph has a cycle: {cycle}")
+        self.cycle = cycle
+
+
 class DAG:
-    def __init__(self, vertex_count: int, edge_count: int):
+    def __init__(self, vertex_count: int, edge_count: int, seed: int | None = None, relabel: bool = False):
+        """edge_count is capped at V(V-1)/2, relabel - vertices are randomly permuted instead of ordered by index"""
         self.vertex_count = vertex_count
         self.edge_count = edge_count
+        self.relabel = relabel
+        self.rng = np.random.default_rng(seed)
 
-        self.edge_list_representation = self.create_random_directed_acyclic_graph()
-        self.adjacency_list_representation = self._get_adjacency_list_representation()
-        self.adjacency_matrix_representation = self._get_adjacency_matrix_representation()
+        self.edge_sources, self.edge_targets = self.sample_random_acyclic_edges()
+        self.edge_count = len(self.edge_sources)
 
         self.visited = None
 
-    def get_all_possible_edges_acyclic(self):
-        edge_list = []
-        for i in range(1, self.vertex_count):
-            for j in range(0, i):
-                edge_list.append(Edge(j, i))
-        return edge_list
-
-    def create_random_directed_acyclic_graph(self) -> list:
+    @classmethod
+    def from_edge_list(cls, vertex_count: int, edge_list) -> "DAG":
+        """Graph with the given (v1, v2) edges, they are not checked for cycles"""
+        edges = np.array(edge_list, dtype=np.int64).reshape(-1, 2)
+        dag = cls(vertex_count, 0)
+        dag.edge_count = len(edges)
+        index_dtype = np.int32 if vertex_count < 2 ** 31 else np.int64
+        dag.edge_sources, dag.edge_targets = edges[:, 0].astype(index_dtype), edges[:, 1].astype(index_dtype)
+        return dag
+
+    @cached_property
+    def edge_list_representation(self) -> list[Edge]:
+        return [Edge(v1, v2) for v1, v2 in zip(self.edge_sources.tolist(), self.edge_targets.tolist())]
+
+    @cached_property
+    def csr_representation(self) -> tuple[np.ndarray, np.ndarray]:
+        """(offsets, targets), successors of v are targets[offsets[v]:offsets[v + 1]], O(V + E) memory"""
+        return self._get_csr_representation()
+
+    @cached_property
+    def adjacency_list_representation(self) -> dict:
+        return self._get_adjacency_list_representation()
+
+    @cached_property
+    def adjacency_matrix_representation(self) -> np.ndarray:
+        return self._get_adjacency_matrix_representation()
+
+    def sample_random_acyclic_edges(self) -> tuple[np.ndarray, np.ndarray]:
+        """O(E) time and memory, distinct pairs are drawn by their index among all V(V-1)/2 pairs i < j"""
         if self.edge_count > self.vertex_count * (self.vertex_count - 1):
             raise ValueError("Too many edges")
-        edge_list = self.get_all_possible_edges_acyclic()
-        random.shuffle(edge_list)
-        return edge_list[:self.edge_count]
+        pair_count = self.vertex_count * (self.vertex_count - 1) // 2
+        edge_count = min(self.edge_count, pair_count)
+        pair_indices = self.rng.choice(pair_count, size=edge_count, replace=False) if edge_count else np.zeros(0, int)
+
+        # Pair index k = j(j-1)/2 + i, decoded with the triangular root and corrected for float rounding
+        pair_indices = pair_indices.astype(np.int64)
+        v2 = ((1 + np.sqrt(1 + 8 * pair_indices.astype(np.float64))) // 2).astype(np.int64)
+        v2 -= v2 * (v2 - 1) // 2 > pair_indices
+        v2 += (v2 + 1) * v2 // 2 <= pair_indices
+        v1 = pair_indices - v2 * (v2 - 1) // 2
+
+        if self.relabel:
+            permutation = self.rng.permutation(self.vertex_count)
+            v1, v2 = permutation[v1], permutation[v2]
+        index_dtype = np.int32 if self.vertex_count < 2 ** 31 else np.int64
+        return v1.astype(index_dtype), v2.astype(index_dtype)
+
+    def _get_csr_representation(self) -> tuple[np.ndarray, np.ndarray]:
+        index_dtype = np.int32 if max(self.vertex_count, len(self.edge_sources)) < 2 ** 31 else np.int64
+        # Stable, so successors keep their edge list order
+        targets = self.edge_targets[np.argsort(self.edge_sources, kind="stable")].astype(index_dtype)
+        offsets = np.zeros(self.vertex_count + 1, dtype=index_dtype)
+        np.cumsum(np.bincount(self.edge_sources, minlength=self.vertex_count), out=offsets[1:])
+        return offsets, targets
 
     def _get_adjacency_list_representation(self) -> dict:
-        adjacency_list = {i: [] for i in range(self.vertex_count)}
-        for v1, v2 in self.edge_list_representation:
-            adjacency_list[v1].append(v2)
-        return adjacency_list
+        offsets, targets = self.csr_representation
+        return {i: targets[offsets[i]:offsets[i + 1]].tolist() for i in range(self.vertex_count)}
 
     def _get_adjacency_matrix_representation(self) -> np.ndarray:
+        offsets, targets = self.csr_representation
         adjacency_matrix = np.zeros((self.vertex_count, self.vertex_count), dtype=bool)
-        for v1, v2 in self.edge_list_representation:
-            adjacency_matrix[v1][v2] = True
+        adjacency_matrix[np.repeat(np.arange(self.vertex_count), np.diff(offsets)), targets] = True
         return adjacency_matrix
 
     def topological_sort_with_dfs_on_adjacency_list(self):
-        stack = deque()
-        self.visited = set()
-        for vertex in self.adjacency_list_representation.keys():
-            stack.extend(self._get_stack_from_dfs_on_adjacency_list(vertex))
-        return list(stack)[::-1]
-
-    def _get_stack_from_dfs_on_adjacency_list(self, vertex):
-        stack = deque()
-        if vertex not in self.visited:
-            self.visited.add(vertex)
-            for ascendant in self.adjacency_list_representation[vertex]:
-                stack.extend(self._get_stack_from_dfs_on_adjacency_list(ascendant))
-            stack.append(vertex)
-        return stack
+        """O(V + E), iterative, vertices are written from the back of the result as they finish"""
+        adjacency_list = self.adjacency_list_representation
+        result = np.empty(self.vertex_count, dtype=np.int64)
+        position = self.vertex_count
+        visited = bytearray(self.vertex_count)
+        for root in range(self.vertex_count):
+            if visited[root]:
+                continue
+            visited[root] = True
+            stack = [(root, iter(adjacency_list[root]))]
+            while stack:
+                vertex, ascendants = stack[-1]
+                for ascendant in ascendants:
+                    if not visited[ascendant]:
+                        visited[ascendant] = True
+                        stack.append((ascendant, iter(adjacency_list[ascendant])))
+                        break
+                else:
+                    stack.pop()
+                    position -= 1
+                    result[position] = vertex
+        return result.tolist()
 
     def topological_sort_with_dfs_on_adjacency_matrix(self):
-        stack = deque()
-        self.visited = set()
-        for vertex_index, vertex_ascendants in enumerate(self.adjacency_matrix_representation):
-            stack.extend(self._get_stack_from_dfs_on_adjacency_matrix(vertex_index))
-        return list(stack)[::-1]
-
-    def _get_stack_from_dfs_on_adjacency_matrix(self, vertex_index):
-        stack = deque()
-        if vertex_index not in self.visited:
-            self.visited.add(vertex_index)
-            for ascendant_index, ascendant in enumerate(self.adjacency_matrix_representation[vertex_index]):
-                if ascendant:
-                    stack.extend(self._get_stack_from_dfs_on_adjacency_matrix(ascendant_index))
-            stack.append(vertex_index)
-        return stack
+        """O(V^2), iterative, every row is scanned once with np.flatnonzero"""
+        adjacency_matrix = self.adjacency_matrix_representation
+        result = np.empty(self.vertex_count, dtype=np.int64)
+        position = self.vertex_count
+        visited = bytearray(self.vertex_count)
+        for root in range(self.vertex_count):
+            if visited[root]:
+                continue
+            visited[root] = True
+            stack = [(root, iter(np.flatnonzero(adjacency_matrix[root]).tolist()))]
+            while stack:
+                vertex_index, ascendant_indices = stack[-1]
+                for ascendant_index in ascendant_indices:
+                    if not visited[ascendant_index]:
+                        visited[ascendant_index] = True
+                        stack.append(
+                            (ascendant_index, iter(np.flatnonzero(adjacency_matrix[ascendant_index]).tolist()))
+                        )
+                        break
+                else:
+                    stack.pop()
+                    position -= 1
+                    result[position] = vertex_index
+        return result.tolist()
 
     @staticmethod
     def has_input_arc(vertex, edge_list: list[Edge]):
@@ -97,3 +162,45 @@ class DAG:
             edge_list = [edge for edge in edge_list if edge.v1 not in precedents_to_be_removed]
         result.extend(set(range(self.vertex_count)) - self.visited)
         return result
+
+    def topological_sort_kahn(self, return_levels: bool = False):
+        """O(V + E), levels[v] - length of the longest path ending in v"""
+        offsets, targets = self.csr_representation
+        offsets = offsets.tolist()
+        targets = targets.tolist()
+        in_degree = np.bincount(self.edge_targets, minlength=self.vertex_count).tolist()
+        levels = [0] * self.vertex_count
+
+        queue = deque(vertex for vertex in range(self.vertex_count) if in_degree[vertex] == 0)
+        result = []
+        while queue:
+            vertex = queue.popleft()
+            result.append(vertex)
+            for ascendant in targets[offsets[vertex]:offsets[vertex + 1]]:
+                if levels[ascendant] <= levels[vertex]:
+                    levels[ascendant] = levels[vertex] + 1
+                in_degree[ascendant] -= 1
+                if in_degree[ascendant] == 0:
+                    queue.append(ascendant)
+
+        if len(result) < self.vertex_count:
+            raise CycleError(self._find_cycle(np.array(in_degree) > 0))
+        if return_levels:
+            return result, levels
+        return result
+
+    def _find_cycle(self, remaining: np.ndarray) -> list:
+        """Every remaining vertex has a remaining predecessor, so walking backwards has to repeat a vertex"""
+        inner_edges = remaining[self.edge_sources] & remaining[self.edge_targets]
+        predecessor = np.full(self.vertex_count, -1, dtype=np.int64)
+        predecessor[self.edge_targets[inner_edges]] = self.edge_sources[inner_edges]
+        predecessor = predecessor.tolist()
+
+        position = {}
+        walk = []
+        vertex = int(np.flatnonzero(remaining)[0])
+        while vertex not in position:
+            position[vertex] = len(walk)
+            walk.append(vertex)
+            vertex = predecessor[vertex]
+        return walk[position[vertex]:][::-1]
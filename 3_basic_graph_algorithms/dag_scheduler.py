@@ -0,0 +1,138 @@
+import asyncio
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+import numpy as np
+
+from dag_report import DAG
+
+# start, end - seconds since the schedule started
+VertexTiming = namedtuple("VertexTiming", "start end")
+
+# critical_path - vertices of the longest path weighted by measured durations
+# achieved_parallelism - total_work / makespan
+# parallelism_bound - total_work / critical_path_length, the best any number of workers could reach
+ScheduleReport = namedtuple(
+    "ScheduleReport",
+    "results timings makespan total_work critical_path critical_path_length achieved_parallelism parallelism_bound "
+    "level_count"
+)
+
+
+def _timed_call(task):
+    """Runs in the worker, perf_counter is a system-wide monotonic clock, so process workers can use it too"""
+    start = time.perf_counter()
+    result = task()
+    return result, start, time.perf_counter()
+
+
+def _get_successor_lists(dag: DAG) -> tuple[list, list]:
+    offsets, targets = dag.csr_representation
+    return offsets.tolist(), targets.tolist()
+
+
+def _get_schedule_report(dag: DAG, order: list, levels: list, results: dict, timings: dict,
+                         makespan: float) -> ScheduleReport:
+    """O(V + E), critical path is relaxed along the topological order"""
+    offsets, targets = _get_successor_lists(dag)
+    durations = [timings[vertex].end - timings[vertex].start for vertex in range(dag.vertex_count)]
+
+    path_length = list(durations)
+    path_parent = [-1] * dag.vertex_count
+    for vertex in order:
+        for ascendant in targets[offsets[vertex]:offsets[vertex + 1]]:
+            if path_length[vertex] + durations[ascendant] > path_length[ascendant]:
+                path_length[ascendant] = path_length[vertex] + durations[ascendant]
+                path_parent[ascendant] = vertex
+
+    critical_path = []
+    if dag.vertex_count:
+        vertex = int(np.argmax(path_length))
+        while vertex != -1:
+            critical_path.append(vertex)
+            vertex = path_parent[vertex]
+        critical_path.reverse()
+    critical_path_length = max(path_length, default=0.0)
+    total_work = sum(durations)
+    return ScheduleReport(
+        results=[results[vertex] for vertex in range(dag.vertex_count)],
+        timings=[timings[vertex] for vertex in range(dag.vertex_count)],
+        makespan=makespan,
+        total_work=total_work,
+        critical_path=critical_path,
+        critical_path_length=critical_path_length,
+        achieved_parallelism=total_work / makespan if makespan else 0.0,
+        parallelism_bound=total_work / critical_path_length if critical_path_length else 0.0,
+        level_count=max(levels, default=-1) + 1,
+    )
+
+
+def run_dag_tasks(dag: DAG, tasks, executor: str = "thread", max_workers: int | None = None) -> ScheduleReport:
+    """Runs tasks[v]() for every vertex, each one as soon as all its predecessors have finished.
+
+    tasks - sequence or mapping indexed by vertex, executor - "thread" or "process"
+    (process tasks have to be picklable). Raises CycleError before running anything if dag has a cycle.
+    """
+    order, levels = dag.topological_sort_kahn(return_levels=True)
+    offsets, targets = _get_successor_lists(dag)
+    in_degree = np.bincount(dag.edge_targets, minlength=dag.vertex_count).tolist()
+    executor_class = {"thread": ThreadPoolExecutor, "process": ProcessPoolExecutor}[executor]
+
+    results = {}
+    timings = {}
+    schedule_start = time.perf_counter()
+    with executor_class(max_workers=max_workers) as pool:
+        running = {
+            pool.submit(_timed_call, tasks[vertex]): vertex
+            for vertex in range(dag.vertex_count) if in_degree[vertex] == 0
+        }
+        while running:
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                vertex = running.pop(future)
+                result, start, end = future.result()
+                results[vertex] = result
+                timings[vertex] = VertexTiming(start - schedule_start, end - schedule_start)
+                for ascendant in targets[offsets[vertex]:offsets[vertex + 1]]:
+                    in_degree[ascendant] -= 1
+                    if in_degree[ascendant] == 0:
+                        running[pool.submit(_timed_call, tasks[ascendant])] = ascendant
+    makespan = time.perf_counter() - schedule_start
+    return _get_schedule_report(dag, order, levels, results, timings, makespan)
+
+
+async def run_dag_tasks_async(dag: DAG, tasks) -> ScheduleReport:
+    """asyncio variant of run_dag_tasks, tasks[v]() returns an awaitable"""
+    order, levels = dag.topological_sort_kahn(return_levels=True)
+    offsets, targets = _get_successor_lists(dag)
+    in_degree = np.bincount(dag.edge_targets, minlength=dag.vertex_count).tolist()
+
+    async def timed_call(vertex):
+        start = time.perf_counter()
+        result = await tasks[vertex]()
+        return vertex, result, start, time.perf_counter()
+
+    results = {}
+    timings = {}
+    schedule_start = time.perf_counter()
+    running = {
+        asyncio.ensure_future(timed_call(vertex))
+        for vertex in range(dag.vertex_count) if in_degree[vertex] == 0
+    }
+    try:
+        while running:
+            finished, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for future in finished:
+                vertex, result, start, end = future.result()
+                results[vertex] = result
+                timings[vertex] = VertexTiming(start - schedule_start, end - schedule_start)
+                for ascendant in targets[offsets[vertex]:offsets[vertex + 1]]:
+                    in_degree[ascendant] -= 1
+                    if in_degree[ascendant] == 0:
+                        running.add(asyncio.ensure_future(timed_call(ascendant)))
+    finally:
+        for future in running:
+            future.cancel()
+    makespan = time.perf_counter() - schedule_start
+    return _get_schedule_report(dag, order, levels, results, timings, makespan)
@@ -0,0 +1,150 @@
+import asyncio
+import random
+import time
+from functools import partial
+
+import numpy as np
+import pytest
+
+import dag_reachability
+import dag_scheduler
+from dag_dynamic import DynamicDAG
+from dag_report import DAG, CycleError
+
+
+def is_topological_order(order, vertex_count, edges):
+    position = {vertex: index for index, vertex in enumerate(order)}
+    return sorted(order) == list(range(vertex_count)) and all(position[v1] < position[v2] for v1, v2 in edges)
+
+
+def get_transitive_closure(dag: DAG) -> np.ndarray:
+    """Floyd-Warshall, every vertex reaches itself"""
+    closure = dag.adjacency_matrix_representation | np.eye(dag.vertex_count, dtype=bool)
+    for k in range(dag.vertex_count):
+        closure |= np.outer(closure[:, k], closure[k])
+    return closure
+
+
+class TestTopologicalSort:
+    @pytest.mark.parametrize("seed", range(5))
+    def test_orders(self, seed):
+        dag = DAG(40, 150, seed=seed, relabel=True)
+        for order in (dag.topological_sort_kahn(), dag.topological_sort_with_dfs_on_adjacency_list(),
+                      dag.topological_sort_with_dfs_on_adjacency_matrix()):
+            assert is_topological_order(order, dag.vertex_count, dag.edge_list_representation)
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_kahn_levels(self, seed):
+        dag = DAG(40, 150, seed=seed, relabel=True)
+        order, levels = dag.topological_sort_kahn(return_levels=True)
+        longest_path = [0] * dag.vertex_count
+        for vertex in order:
+            for v1, v2 in dag.edge_list_representation:
+                if v1 == vertex:
+                    longest_path[v2] = max(longest_path[v2], longest_path[v1] + 1)
+        assert levels == longest_path
+
+    def test_edge_count_is_capped(self):
+        dag = DAG(5, 15)
+        assert dag.edge_count == len(dag.edge_list_representation) == 10
+
+    def test_cycle_report(self):
+        edges = [(0, 1), (1, 2), (2, 3), (3, 1), (3, 4)]
+        with pytest.raises(CycleError) as error:
+            DAG.from_edge_list(5, edges).topological_sort_kahn()
+        cycle = error.value.cycle
+        assert len(cycle) == 3 and all((v1, v2) in edges for v1, v2 in zip(cycle, cycle[1:] + cycle[:1]))
+
+
+class TestDynamicDAG:
+    @pytest.mark.parametrize("seed", range(5))
+    def test_random_updates(self, seed):
+        rng = random.Random(seed)
+        vertex_count = 25
+        dynamic_dag = DynamicDAG(vertex_count)
+        edges = set()
+        for _ in range(400):
+            v1, v2 = rng.randrange(vertex_count), rng.randrange(vertex_count)
+            if edges and rng.random() < 0.2:
+                v1, v2 = rng.choice(sorted(edges))
+                dynamic_dag.remove_edge(v1, v2)
+                edges.remove((v1, v2))
+            else:
+                order = dynamic_dag.topological_order()
+                try:
+                    dynamic_dag.add_edge(v1, v2)
+                    edges.add((v1, v2))
+                except CycleError as error:
+                    # Nothing changed, and the new edge closes the reported cycle
+                    assert dynamic_dag.topological_order() == order
+                    cycle = error.cycle
+                    assert cycle[0] == v1 and (len(cycle) == 1 or cycle[1] == v2)
+                    assert all((a, b) in edges for a, b in zip(cycle[1:], cycle[2:] + cycle[:1]))
+            assert set(dynamic_dag.edge_list_representation) == edges
+            assert is_topological_order(dynamic_dag.topological_order(), vertex_count, edges)
+
+    def test_from_dag(self):
+        dag = DAG(30, 100, seed=0, relabel=True)
+        dynamic_dag = DynamicDAG.from_dag(dag)
+        assert set(dynamic_dag.edge_list_representation) == set(dag.edge_list_representation)
+        assert is_topological_order(dynamic_dag.topological_order(), 30, dag.edge_list_representation)
+
+    def test_remove_missing_edge(self):
+        with pytest.raises(KeyError):
+            DynamicDAG(3).remove_edge(0, 1)
+
+
+class TestReachability:
+    @pytest.mark.parametrize("seed", range(3))
+    def test_indexes_match_closure(self, seed):
+        dag = DAG(60, 120, seed=seed, relabel=True)
+        closure = get_transitive_closure(dag)
+        us, vs = np.divmod(np.arange(dag.vertex_count ** 2), dag.vertex_count)
+        for index in (dag_reachability.BitsetReachabilityIndex(dag),
+                      dag_reachability.IntervalReachabilityIndex(dag, seed=seed)):
+            assert index.are_reachable(us, vs).tolist() == closure[us, vs].tolist()
+            assert all(index.is_reachable(u, v) == closure[u, v] for u, v in zip(us.tolist(), vs.tolist()))
+
+    def test_build_reachability_index(self):
+        dag = DAG(10, 20, seed=0)
+        assert isinstance(dag_reachability.build_reachability_index(dag), dag_reachability.BitsetReachabilityIndex)
+        assert isinstance(dag_reachability.build_reachability_index(dag, max_bitset_bytes=0),
+                          dag_reachability.IntervalReachabilityIndex)
+
+
+def sleep_and_return(vertex):
+    time.sleep(0.001)
+    return vertex
+
+
+class TestScheduler:
+    dag = DAG(20, 40, seed=0, relabel=True)
+
+    def check_report(self, report):
+        assert report.results == list(range(self.dag.vertex_count))
+        for v1, v2 in self.dag.edge_list_representation:
+            assert report.timings[v1].end <= report.timings[v2].start
+        assert report.critical_path_length <= report.makespan
+        edges = set(self.dag.edge_list_representation)
+        assert report.critical_path
+        assert all(edge in edges for edge in zip(report.critical_path, report.critical_path[1:]))
+
+    @pytest.mark.parametrize("executor", ["thread", "process"])
+    def test_dependencies(self, executor):
+        tasks = [partial(sleep_and_return, vertex) for vertex in range(self.dag.vertex_count)]
+        self.check_report(dag_scheduler.run_dag_tasks(self.dag, tasks, executor=executor, max_workers=4))
+
+    def test_dependencies_async(self):
+        async def task(vertex):
+            await asyncio.sleep(0.001)
+            return vertex
+
+        tasks = [partial(task, vertex) for vertex in range(self.dag.vertex_count)]
+        self.check_report(asyncio.run(dag_scheduler.run_dag_tasks_async(self.dag, tasks)))
+
+    def test_cycle_is_rejected_before_running(self):
+        started = []
+        dag = DAG.from_edge_list(2, [(0, 1), (1, 0)])
+        with pytest.raises(CycleError):
+            dag_scheduler.run_dag_tasks(dag, [lambda: started.append(0), lambda: started.append(1)])
+        assert not started
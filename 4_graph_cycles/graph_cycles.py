@@ -1,21 +1,84 @@
-import copy
-from collections import deque
+import time
+from collections import Counter, deque
+from collections.abc import Mapping
+from types import MappingProxyType
 
 import random
 
+import numpy as np
 
-def is_graph(graph: {int: [int]}):
-    for initial_vertex in graph:
-        for terminal_vertex in graph[initial_vertex]:
-            if initial_vertex not in graph[terminal_vertex]:
+HELD_KARP_MAX_VERTICES = 24
+DEADLINE_CHECK_INTERVAL = 1024
+
+
+def _is_symmetric(graph: {int: [int]}) -> bool:
+    """O(v + e), every edge has to be listed as often from both ends, a loop an even number of times"""
+    neighbour_counts = {vertex: Counter(terminal_vertices) for vertex, terminal_vertices in graph.items()}
+    for initial_vertex, terminal_counts in neighbour_counts.items():
+        for terminal_vertex, count in terminal_counts.items():
+            if terminal_vertex == initial_vertex:
+                if count % 2:
+                    return False
+            elif terminal_vertex not in neighbour_counts or neighbour_counts[terminal_vertex][initial_vertex] != count:
                 return False
     return True
 
 
+class UndirectedGraph(Mapping):
+    """Immutable undirected graph, validated once at construction, read as {vertex: (neighbours)}"""
+
+    __slots__ = ("vertices", "vertex_index", "neighbours", "neighbour_sets", "degrees")
+
+    def __init__(self, graph: {int: [int]}):
+        """O(v + e)"""
+        if not _is_symmetric(graph):
+            raise ValueError("Not an undirected graph.")
+        vertices = tuple(graph)
+        neighbours = tuple(tuple(graph[vertex]) for vertex in vertices)
+        object.__setattr__(self, "vertices", vertices)
+        object.__setattr__(self, "vertex_index",
+                           MappingProxyType({vertex: index for index, vertex in enumerate(vertices)}))
+        object.__setattr__(self, "neighbours", neighbours)
+        object.__setattr__(self, "neighbour_sets",
+                           tuple(frozenset(terminal_vertices) for terminal_vertices in neighbours))
+        object.__setattr__(self, "degrees", tuple(len(terminal_vertices) for terminal_vertices in neighbours))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{self.__class__.__name__} is immutable.")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{self.__class__.__name__} is immutable.")
+
+    def __getitem__(self, vertex) -> tuple:
+        return self.neighbours[self.vertex_index[vertex]]
+
+    def __iter__(self):
+        return iter(self.vertices)
+
+    def __len__(self):
+        return len(self.vertices)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({dict(self.items())})"
+
+    def are_adjacent(self, initial_vertex, terminal_vertex) -> bool:
+        """O(1)"""
+        return terminal_vertex in self.neighbour_sets[self.vertex_index[initial_vertex]]
+
+    def degree(self, vertex) -> int:
+        return self.degrees[self.vertex_index[vertex]]
+
+
+def is_graph(graph: {int: [int]}):
+    """O(v + e)"""
+    return isinstance(graph, UndirectedGraph) or _is_symmetric(graph)
+
+
 def check_and_copy_graph(graph):
+    """O(v + e), mutable adjacency lists for algorithms that remove edges, an UndirectedGraph is only copied"""
     if not is_graph(graph):
         raise ValueError("Not an undirected graph.")
-    return copy.deepcopy(graph)
+    return {vertex: list(terminal_vertices) for vertex, terminal_vertices in graph.items()}
 
 
 def generate_random_simple_graph(vertex_count: int, edge_count: int) -> dict:
@@ -90,47 +153,358 @@ def get_connected_graph_list(graph: {int: [int]}) -> [deque]:
     return connected_graph_node_list
 
 
-def find_euler_cycle_using_hierholzer(connected_graph) -> deque:
-    """O(v^2)"""
-    connected_graph = check_and_copy_graph(connected_graph)
+def _get_incidence_lists(graph: {int: [int]}) -> tuple[list, list, list, list, int]:
+    """O(v + e), (vertices, offsets, neighbours, edge_ids, edge_count)
+
+    Incidences of the vertex with index i are neighbours[offsets[i]:offsets[i + 1]] (vertex indices) in graph[u] order,
+    both ends of an edge share its id. A loop is listed twice in graph[u].
+    """
+    vertices = list(graph)
+    vertex_count = len(vertices)
+    vertex_index = {vertex: index for index, vertex in enumerate(vertices)}
+    offsets = [0]
+    neighbours = []
+    edge_ids = []
+    pending_edge_ids = {}  # lower index * v + higher index - ids waiting for their second end
+    edge_count = 0
+    for initial_index, initial_vertex in enumerate(vertices):
+        for terminal_vertex in graph[initial_vertex]:
+            terminal_index = vertex_index.get(terminal_vertex)
+            if terminal_index is None:
+                raise ValueError("Not an undirected graph.")
+            if initial_index < terminal_index:
+                key = initial_index * vertex_count + terminal_index
+            else:
+                key = terminal_index * vertex_count + initial_index
+            if initial_index > terminal_index or (initial_index == terminal_index and key in pending_edge_ids):
+                waiting = pending_edge_ids.get(key)
+                if waiting is None:
+                    raise ValueError("Not an undirected graph.")
+                edge_id = waiting.pop()
+                if not waiting:
+                    del pending_edge_ids[key]
+            else:
+                edge_id = edge_count
+                edge_count += 1
+                if key in pending_edge_ids:
+                    pending_edge_ids[key].append(edge_id)
+                else:
+                    pending_edge_ids[key] = [edge_id]
+            neighbours.append(terminal_index)
+            edge_ids.append(edge_id)
+        offsets.append(len(neighbours))
+    if pending_edge_ids:
+        raise ValueError("Not an undirected graph.")
+    return vertices, offsets, neighbours, edge_ids, edge_count
 
-    if not has_euler_trail(connected_graph):
-        return deque()
 
-    u = list(connected_graph.keys())[-1]
-    stack = deque([u])
-    result = deque()
+def _walk_hierholzer(offsets: list, neighbours: list, edge_ids: list, edge_count: int, start: int) -> list:
+    """O(v + e), iterative, vertex indices in the order they leave the stack (the walk reversed)
+
+    Every vertex reads its incidences from the end and skips the used ones, so each incidence is seen once.
+    """
+    used = bytearray(edge_count)
+    pointers = offsets[1:]
+    stack = [start]
+    result = []
     while stack:
         u = stack[-1]
-        while connected_graph[u]:
-            v = connected_graph[u].pop()
-            stack.append(v)
-            connected_graph[v].remove(u)
-            u = v
-        result.append(stack.pop())
+        pointer = pointers[u]
+        while pointer > offsets[u] and used[edge_ids[pointer - 1]]:
+            pointer -= 1
+        if pointer > offsets[u]:
+            pointer -= 1
+            used[edge_ids[pointer]] = True
+            stack.append(neighbours[pointer])
+        else:
+            result.append(stack.pop())
+        pointers[u] = pointer
+    return result
+
+
+def _find_euler_walk(connected_graph: {int: [int]}, allow_trail: bool) -> deque:
+    vertices, offsets, neighbours, edge_ids, edge_count = _get_incidence_lists(connected_graph)
+    if not edge_count:
+        return deque()
 
-    if result[0] == result[-1] and len(result) > 1:
-        return result
-    return deque()
+    odd_indices = [index for index in range(len(vertices)) if (offsets[index + 1] - offsets[index]) % 2 == 1]
+    if odd_indices and not (allow_trail and len(odd_indices) == 2):
+        return deque()
+    if odd_indices:
+        start = odd_indices[0]
+    else:
+        start = next(index for index in reversed(range(len(vertices))) if offsets[index + 1] > offsets[index])
+
+    result = _walk_hierholzer(offsets, neighbours, edge_ids, edge_count, start)
+    # Edges in another component were never reached
+    if len(result) != edge_count + 1:
+        return deque()
+    if odd_indices:
+        result.reverse()
+    return deque(vertices[index] for index in result)
 
 
-def find_hamiltonian_cycle_using_backtracking(connected_graph: {int: [int]}, path: [int]) -> [int]:
-    """O(v!)"""
-    connected_graph = check_and_copy_graph(connected_graph)
+def find_euler_cycle_using_hierholzer(connected_graph) -> deque:
+    """O(v + e), empty deque when there is no Euler cycle"""
+    return _find_euler_walk(connected_graph, allow_trail=False)
 
-    if not path:
-        path = list(connected_graph.keys())[:1]
 
-    u = path[-1]
+def find_euler_trail_using_hierholzer(connected_graph) -> deque:
+    """O(v + e), Euler cycle, or an open trail starting at an odd vertex, empty deque when there is neither"""
+    return _find_euler_walk(connected_graph, allow_trail=True)
 
-    if len(path) == len(connected_graph.keys()):
-        v = path[0]
-        if v in connected_graph[u]:
-            return path
+
+def _get_bit_masks(graph: {int: [int]}) -> tuple[list, list, list]:
+    """O(v + e), (vertices, out_masks, in_masks), bit i stands for vertices[i], graph may be directed"""
+    vertices = list(graph)
+    vertex_index = {vertex: index for index, vertex in enumerate(vertices)}
+    out_masks = [0] * len(vertices)
+    in_masks = [0] * len(vertices)
+    for initial_index, initial_vertex in enumerate(vertices):
+        for terminal_vertex in graph[initial_vertex]:
+            terminal_index = vertex_index.get(terminal_vertex)
+            if terminal_index is None:
+                raise ValueError(f"Unknown vertex {terminal_vertex!r}.")
+            out_masks[initial_index] |= 1 << terminal_index
+            in_masks[terminal_index] |= 1 << initial_index
+    return vertices, out_masks, in_masks
+
+
+def _iterate_bits(mask: int):
+    while mask:
+        lowest_bit = mask & -mask
+        yield lowest_bit.bit_length() - 1
+        mask ^= lowest_bit
+
+
+def _get_deadline(time_budget: float | None) -> float | None:
+    return None if time_budget is None else time.perf_counter() + time_budget
+
+
+def _check_deadline(deadline: float | None):
+    if deadline is not None and time.perf_counter() > deadline:
+        raise TimeoutError("Hamiltonian search exceeded its time budget.")
+
+
+def _find_hamiltonian_path_using_held_karp(out_masks: list, in_masks: list, start: int, close_cycle: bool,
+                                           deadline: float | None) -> list:
+    """O(2^v * v) time, O(2^v) memory
+
+    Others are all vertices but start, ends[mask] is the bitset of others ending a path that leaves start and visits
+    exactly the others in mask. Masks are expanded one popcount layer at a time, only the reachable ones are kept.
+    """
+    others = [vertex for vertex in range(len(out_masks)) if vertex != start]
+    if not others:
+        return [start] if not close_cycle or out_masks[start] >> start & 1 else []
+
+    def to_others_mask(mask: int) -> int:
+        return sum(1 << i for i, vertex in enumerate(others) if mask >> vertex & 1)
+
+    predecessor_masks = [to_others_mask(in_masks[vertex]) for vertex in others]
+    ends = np.zeros(1 << len(others), dtype=np.uint32)
+    # Deduplicates the next layer in O(layer size), the last write to every mask wins
+    last_writer = np.empty(1 << len(others), dtype=np.int32)
+    layer = np.array([1 << i for i, vertex in enumerate(others) if out_masks[start] >> vertex & 1], dtype=np.int32)
+    ends[layer] = layer
+    for _ in range(len(others) - 1):
+        next_layers = []
+        layer_ends = ends[layer]
+        for i, predecessor_mask in enumerate(predecessor_masks):
+            _check_deadline(deadline)
+            can_extend = ((layer >> i) & 1 == 0) & ((layer_ends & np.uint32(predecessor_mask)) != 0)
+            extended = layer[can_extend] | np.int32(1 << i)
+            ends[extended] |= np.uint32(1 << i)
+            next_layers.append(extended)
+        candidates = np.concatenate(next_layers)
+        positions = np.arange(len(candidates), dtype=np.int32)
+        last_writer[candidates] = positions
+        layer = candidates[last_writer[candidates] == positions]
+
+    full_mask = (1 << len(others)) - 1
+    final_ends = int(ends[full_mask])
+    if close_cycle:
+        final_ends &= to_others_mask(in_masks[start])
+    if not final_ends:
+        return []
+
+    mask = full_mask
+    end = (final_ends & -final_ends).bit_length() - 1
+    path = [others[end]]
+    while mask != 1 << end:
+        mask ^= 1 << end
+        previous_ends = int(ends[mask]) & predecessor_masks[end]
+        end = (previous_ends & -previous_ends).bit_length() - 1
+        path.append(others[end])
+    path.append(start)
+    return path[::-1]
+
+
+def _get_reachable_mask(out_masks: list, start: int, allowed: int) -> int:
+    """Flood fill over allowed vertices, start included"""
+    reached = 1 << start
+    frontier = reached
+    while frontier:
+        next_frontier = 0
+        for vertex in _iterate_bits(frontier):
+            next_frontier |= out_masks[vertex]
+        frontier = next_frontier & allowed & ~reached
+        reached |= frontier
+    return reached
+
+
+def _may_have_hamiltonian_cycle(out_masks: list, in_masks: list) -> bool:
+    """O(v^2) bit operations, a cycle needs a strongly connected graph, an undirected one also needs no cut vertex"""
+    full_mask = (1 << len(out_masks)) - 1
+    for masks in (out_masks, in_masks):
+        if _get_reachable_mask(masks, 0, full_mask) != full_mask:
+            return False
+    if out_masks != in_masks or len(out_masks) < 3:
+        return True
+    for vertex in range(len(out_masks)):
+        remaining = full_mask & ~(1 << vertex)
+        if _get_reachable_mask(out_masks, (remaining & -remaining).bit_length() - 1, remaining) != remaining:
+            return False
+    return True
+
+
+def _get_hamiltonian_moves(out_masks: list, in_masks: list, path: list, visited: int, close_cycle: bool,
+                           symmetric: bool) -> list:
+    """Next vertices for the path, most constrained last (Warnsdorff), empty list when the branch is dead
+
+    Every unvisited vertex needs a possible predecessor and a distinct possible successor, or has to be the last one.
+    A vertex whose only possible predecessor is the current end is a forced move, so is (in an undirected cycle)
+    a vertex with two possible neighbours, one of them the end. The unvisited vertices have to be reachable
+    from the end.
+    """
+    end = path[-1]
+    end_bit = 1 << end
+    unvisited = (1 << len(out_masks)) - 1 & ~visited
+    closing_bit = 1 << path[0] if close_cycle else 0
+    if close_cycle and not in_masks[path[0]] & unvisited:
+        return []
+
+    forced = 0
+    last_count = 0
+    for vertex in _iterate_bits(unvisited):
+        predecessors = in_masks[vertex] & (unvisited | end_bit)
+        successors = out_masks[vertex] & (unvisited | closing_bit)
+        if not predecessors:
+            return []
+        if predecessors == successors and not predecessors & (predecessors - 1) and unvisited != 1 << vertex:
+            # The only neighbour cannot be both the predecessor and the successor
+            successors = 0
+        if not successors & ~closing_bit:
+            if close_cycle and not successors:
+                return []
+            last_count += 1
+        if predecessors == end_bit:
+            forced |= 1 << vertex
+        elif symmetric and close_cycle and len(path) > 1 and predecessors & end_bit:
+            neighbours = predecessors | successors
+            if (neighbours & ~end_bit).bit_count() == 1:
+                forced |= 1 << vertex
+    if last_count > 1 or forced & (forced - 1):
+        return []
+
+    if _get_reachable_mask(out_masks, end, unvisited) != unvisited | end_bit:
+        return []
+
+    if forced:
+        return [forced.bit_length() - 1]
+    moves = list(_iterate_bits(out_masks[end] & unvisited))
+    moves.sort(key=lambda vertex: ((out_masks[vertex] & unvisited).bit_count(), vertex), reverse=True)
+    return moves
+
+
+def _find_hamiltonian_path_using_backtracking(out_masks: list, in_masks: list, path: list, close_cycle: bool,
+                                              deadline: float | None) -> list:
+    """O(v!) worst case, iterative, visited vertices are a bitset, path is extended from the given prefix"""
+    full_mask = (1 << len(out_masks)) - 1
+    path = list(path)
+    visited = 0
+    for vertex in path:
+        visited |= 1 << vertex
+
+    def is_complete() -> bool:
+        return visited == full_mask and (not close_cycle or out_masks[path[-1]] >> path[0] & 1)
+
+    if visited == full_mask:
+        return path if is_complete() else []
+    # Loops only matter for a single vertex cycle, the pruning assumes there are none
+    out_masks = [mask & ~(1 << vertex) for vertex, mask in enumerate(out_masks)]
+    in_masks = [mask & ~(1 << vertex) for vertex, mask in enumerate(in_masks)]
+    if close_cycle and not _may_have_hamiltonian_cycle(out_masks, in_masks):
         return []
 
-    for v in connected_graph[u]:
-        if v not in path:
-            if return_value := find_hamiltonian_cycle_using_backtracking(connected_graph, path + [v]):
-                return return_value
+    prefix_length = len(path)
+    symmetric = out_masks == in_masks
+    choices = [_get_hamiltonian_moves(out_masks, in_masks, path, visited, close_cycle, symmetric)]
+    step = 0
+    while choices:
+        step += 1
+        if step % DEADLINE_CHECK_INTERVAL == 0:
+            _check_deadline(deadline)
+        if not choices[-1]:
+            choices.pop()
+            if len(path) > prefix_length:
+                visited ^= 1 << path.pop()
+            continue
+        vertex = choices[-1].pop()
+        path.append(vertex)
+        visited |= 1 << vertex
+        if is_complete():
+            return path
+        if visited == full_mask:
+            choices.append([])
+        else:
+            choices.append(_get_hamiltonian_moves(out_masks, in_masks, path, visited, close_cycle, symmetric))
     return []
+
+
+def _find_hamiltonian_path(out_masks: list, in_masks: list, start: int, close_cycle: bool,
+                           time_budget: float | None) -> list:
+    """Held-Karp up to HELD_KARP_MAX_VERTICES vertices, pruned backtracking above"""
+    deadline = _get_deadline(time_budget)
+    if len(out_masks) <= HELD_KARP_MAX_VERTICES:
+        return _find_hamiltonian_path_using_held_karp(out_masks, in_masks, start, close_cycle, deadline)
+    return _find_hamiltonian_path_using_backtracking(out_masks, in_masks, [start], close_cycle, deadline)
+
+
+def find_hamiltonian_cycle(graph: {int: [int]}, time_budget: float | None = None) -> list:
+    """Cycle starting at the first vertex, without repeating it, empty list when there is none
+
+    graph may be directed, an undirected cycle is oriented so that the second vertex precedes the last one in graph.
+    Raises TimeoutError when time_budget seconds run out.
+    """
+    vertices, out_masks, in_masks = _get_bit_masks(graph)
+    if not vertices:
+        return []
+    cycle = _find_hamiltonian_path(out_masks, in_masks, 0, True, time_budget)
+    if len(cycle) > 2 and out_masks == in_masks and cycle[1] > cycle[-1]:
+        cycle[1:] = cycle[:0:-1]
+    return [vertices[index] for index in cycle]
+
+
+def find_hamiltonian_path(graph: {int: [int]}, start, time_budget: float | None = None) -> list:
+    """Path starting at start and visiting every vertex once, empty list when there is none
+
+    graph may be directed. Raises TimeoutError when time_budget seconds run out.
+    """
+    vertices, out_masks, in_masks = _get_bit_masks(graph)
+    if start not in graph:
+        raise ValueError(f"Unknown vertex {start!r}.")
+    path = _find_hamiltonian_path(out_masks, in_masks, vertices.index(start), False, time_budget)
+    return [vertices[index] for index in path]
+
+
+def find_hamiltonian_cycle_using_backtracking(connected_graph: {int: [int]}, path: [int]) -> [int]:
+    """O(2^v * v) up to HELD_KARP_MAX_VERTICES vertices, pruned O(v!) above, path - prefix of the cycle"""
+    if not isinstance(connected_graph, UndirectedGraph):
+        connected_graph = UndirectedGraph(connected_graph)
+    if not path:
+        return find_hamiltonian_cycle(connected_graph)
+
+    vertices, out_masks, in_masks = _get_bit_masks(connected_graph)
+    prefix = [connected_graph.vertex_index[vertex] for vertex in path]
+    cycle = _find_hamiltonian_path_using_backtracking(out_masks, in_masks, prefix, True, None)
+    return [vertices[index] for index in cycle]
@@ -141,3 +141,143 @@ def test_hamiltonian_backtracking_ring_exists():
         8: [7, 1],
     }
     assert graph_cycles.find_hamiltonian_cycle_using_backtracking(ring_graph, [])
+
+
+class TestUndirectedGraph:
+    connected_graph = {
+        1: [2, 3],
+        2: [1, 3],
+        3: [1, 2],
+    }
+
+    def test_not_undirected(self):
+        with pytest.raises(ValueError):
+            graph_cycles.UndirectedGraph({1: [2], 2: []})
+        with pytest.raises(ValueError):
+            graph_cycles.UndirectedGraph({1: [2]})
+        with pytest.raises(ValueError):
+            graph_cycles.UndirectedGraph({1: [2, 2], 2: [1]})
+
+    def test_mapping(self):
+        graph = graph_cycles.UndirectedGraph(self.connected_graph)
+        assert list(graph) == [1, 2, 3] and graph[1] == (2, 3) and graph.degree(3) == 2
+        assert graph.are_adjacent(1, 3) and graph_cycles.is_graph(graph)
+        with pytest.raises(TypeError):
+            graph[1] = [2]
+        with pytest.raises(AttributeError):
+            graph.neighbours = ()
+        with pytest.raises(TypeError):
+            graph.vertex_index[3] = 0
+
+    def test_working_copy_is_independent(self):
+        graph = graph_cycles.UndirectedGraph(self.connected_graph)
+        working_copy = graph_cycles.check_and_copy_graph(graph)
+        working_copy[1].pop()
+        assert graph[1] == (2, 3)
+
+    def test_multigraph(self):
+        graph = graph_cycles.UndirectedGraph({1: [1, 1, 2, 2, 2], 2: [1, 1, 1]})
+        assert graph.degree(1) == 5 and graph_cycles.find_euler_trail_using_hierholzer(graph) == deque(
+            [1, 2, 1, 1, 2]
+        )
+
+    def test_algorithms_accept_graph(self):
+        graph = graph_cycles.UndirectedGraph(self.connected_graph)
+        assert graph_cycles.count_odd_degrees(graph) == 0
+        assert graph_cycles.find_euler_cycle_using_hierholzer(graph) == deque([3, 1, 2, 3])
+        assert graph_cycles.find_hamiltonian_cycle_using_backtracking(graph, []) == [1, 2, 3]
+
+
+class TestEulerTrail:
+    path_graph = {
+        1: [2],
+        2: [1, 3],
+        3: [2],
+    }
+
+    def test_open_trail_starts_at_odd_vertex(self):
+        assert graph_cycles.find_euler_trail_using_hierholzer(self.path_graph) == deque([1, 2, 3])
+
+    def test_cycle_function_rejects_open_trail(self):
+        assert graph_cycles.find_euler_cycle_using_hierholzer(self.path_graph) == deque([])
+
+    def test_trail_falls_back_to_cycle(self):
+        ring_graph = graph_cycles.generate_euler_and_hamilton_cycle_graph(5)
+        trail = graph_cycles.find_euler_trail_using_hierholzer(ring_graph)
+        assert len(trail) == 6 and trail[0] == trail[-1]
+
+    def test_disconnected_edges(self):
+        two_triangles = {
+            1: [2, 3], 2: [1, 3], 3: [1, 2],
+            4: [5, 6], 5: [4, 6], 6: [4, 5],
+        }
+        assert graph_cycles.find_euler_trail_using_hierholzer(two_triangles) == deque([])
+
+    def test_multigraph(self):
+        assert graph_cycles.find_euler_trail_using_hierholzer({1: [1, 1, 2, 2, 2], 2: [1, 1, 1]}) == deque(
+            [1, 2, 1, 1, 2]
+        )
+
+    def test_not_undirected(self):
+        with pytest.raises(ValueError):
+            graph_cycles.find_euler_trail_using_hierholzer({1: [2, 2], 2: [1]})
+
+    def test_long_ring(self):
+        ring_graph = graph_cycles.generate_euler_and_hamilton_cycle_graph(100_000)
+        assert len(graph_cycles.find_euler_cycle_using_hierholzer(ring_graph)) == 100_001
+
+
+class TestHamiltonianEngine:
+    petersen_graph = {
+        0: [1, 4, 5], 1: [0, 2, 6], 2: [1, 3, 7], 3: [2, 4, 8], 4: [3, 0, 9],
+        5: [0, 7, 8], 6: [1, 8, 9], 7: [2, 9, 5], 8: [3, 5, 6], 9: [4, 6, 7],
+    }
+    directed_graph = {
+        "A": "B",
+        "B": "CD",
+        "C": "A",
+        "D": "C",
+    }
+
+    @staticmethod
+    def is_hamiltonian_cycle(graph, cycle):
+        return sorted(cycle) == sorted(graph) and all(
+            terminal_vertex in graph[initial_vertex]
+            for initial_vertex, terminal_vertex in zip(cycle, cycle[1:] + cycle[:1])
+        )
+
+    @pytest.mark.parametrize("held_karp_max_vertices", [graph_cycles.HELD_KARP_MAX_VERTICES, 0])
+    def test_engines(self, monkeypatch, held_karp_max_vertices):
+        monkeypatch.setattr(graph_cycles, "HELD_KARP_MAX_VERTICES", held_karp_max_vertices)
+        ring_graph = graph_cycles.generate_euler_and_hamilton_cycle_graph(12)
+
+        assert graph_cycles.find_hamiltonian_cycle({1: [2, 3], 2: [1, 3], 3: [1, 2]}) == [1, 2, 3]
+        assert graph_cycles.find_hamiltonian_cycle(ring_graph) == list(range(12))
+        assert graph_cycles.find_hamiltonian_cycle(self.petersen_graph) == []
+        assert self.is_hamiltonian_cycle(self.directed_graph, graph_cycles.find_hamiltonian_cycle(self.directed_graph))
+        assert graph_cycles.find_hamiltonian_path(self.directed_graph, "D") == ["D", "C", "A", "B"]
+        assert graph_cycles.find_hamiltonian_path({"A": "B", "B": "C", "C": ""}, "B") == []
+
+    def test_large_graph_backtracking(self):
+        ring_graph = graph_cycles.generate_euler_and_hamilton_cycle_graph(200)
+        for vertex in range(0, 200, 7):
+            ring_graph[vertex].append((vertex + 100) % 200)
+            ring_graph[(vertex + 100) % 200].append(vertex)
+        assert self.is_hamiltonian_cycle(ring_graph, graph_cycles.find_hamiltonian_cycle(ring_graph))
+
+        # Two cliques sharing vertex 15
+        cut_vertex_graph = {}
+        for vertex in range(16, 31):
+            cut_vertex_graph[vertex] = [neighbour for neighbour in range(15, 31) if neighbour != vertex]
+        for vertex in range(15):
+            cut_vertex_graph[vertex] = [neighbour for neighbour in range(16) if neighbour != vertex]
+        cut_vertex_graph[15] = [neighbour for neighbour in range(31) if neighbour != 15]
+        assert graph_cycles.find_hamiltonian_cycle(cut_vertex_graph) == []
+
+    def test_time_budget(self):
+        with pytest.raises(TimeoutError):
+            graph_cycles.find_hamiltonian_cycle(graph_cycles.generate_euler_and_hamilton_cycle_graph(20), time_budget=0)
+
+    def test_backtracking_with_prefix(self):
+        ring_graph = graph_cycles.generate_euler_and_hamilton_cycle_graph(6)
+        assert graph_cycles.find_hamiltonian_cycle_using_backtracking(ring_graph, [0, 5]) == [0, 5, 4, 3, 2, 1]
@@ -1,9 +1,19 @@
+import argparse
+import csv
+import json
 import random
-import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
+import statistics
+from bisect import bisect_right
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import numpy as np
 from timeit import default_timer as timer
 
+#value - best value found, elements - indices of the chosen elements
+#upper_bound - proven bound on the optimum, gap - upper_bound-value (0 when optimal)
+BranchAndBoundResult=namedtuple("BranchAndBoundResult", "value elements upper_bound gap")
+
 def generate_random_elements(N, M):
     l=[[0, 0] for i in range(N)]
     for i in range(N):
@@ -28,55 +38,301 @@ def knapsack_problem(M, N, table_of_elements):
                 l[i][j]=max(l[i-1][j], vi+l[i-1][j-wi])
     return l[N][M]
 
-def plot_graph(listt, times, number):
-    if (number==1):
+#l[j] - best value of the given elements for capacity j
+#the row is int64 for integer values and float64 as soon as any value is not an integer
+
+def _knapsack_row(M, elements):
+    """O(len(elements)*M) time, O(M) memory"""
+    l=np.zeros(M+1, dtype=np.result_type(np.int64, *(vi for vi, wi in elements)))
+    for vi, wi in elements:
+        if wi==0:
+            if vi>0:
+                l+=vi
+        elif wi<=M:
+            #right hand side is evaluated on the old row before it is written back
+            np.maximum(l[wi:], l[:-wi]+vi, out=l[wi:])
+    return l
+
+#M - capacity of knapsack or a batch (sequence) of capacities
+#the answer for every capacity is read from the same rolling row
+
+def knapsack_problem_vectorized(M, N, table_of_elements):
+    """O(N*M) time, O(M) memory"""
+    capacities=np.asarray(M, dtype=np.int64)
+    if capacities.size and capacities.min()<0:
+        raise ValueError("Capacity must not be negative.")
+    max_capacity=int(capacities.max()) if capacities.size else 0
+    l=_knapsack_row(max_capacity, table_of_elements[:N])
+    if capacities.ndim==0:
+        return l[capacities].item()
+    return l[capacities]
+
+#states - non-dominated (weight, value) pairs sorted by weight, values strictly increasing
+
+def knapsack_problem_pareto(M, N, table_of_elements):
+    """O(N*S) time, where S is the number of surviving states (at most M+1)"""
+    states=[(0, 0)]
+    for i in range(N):
+        vi=table_of_elements[i][0]
+        wi=table_of_elements[i][1]
+        if wi>M:
+            continue
+        shifted=[(w+wi, v+vi) for w, v in states if w+wi<=M]
+        merged=[]
+        a=0
+        b=0
+        while a<len(states) or b<len(shifted):
+            if b==len(shifted) or (a<len(states) and (states[a][0], -states[a][1])<(shifted[b][0], -shifted[b][1])):
+                state=states[a]
+                a+=1
+            else:
+                state=shifted[b]
+                b+=1
+            #a state is kept only if it is more valuable than every lighter one
+            if not merged or state[1]>merged[-1][1]:
+                merged.append(state)
+        states=merged
+    return states[-1][1]
+
+#elements are searched in order of decreasing value density
+#bounds come from the fractional relaxation over the remaining elements
+#time_budget - seconds, node_budget - number of expanded nodes
+
+def knapsack_problem_branch_and_bound(M, N, table_of_elements, time_budget=None, node_budget=None):
+    """O(2^N) worst case, stops early when a budget is exhausted"""
+    base_value=0
+    base_elements=[]
+    order=[]
+    for i in range(N):
+        vi=table_of_elements[i][0]
+        wi=table_of_elements[i][1]
+        if vi<=0 or wi>M:
+            continue
+        if wi==0:
+            base_value+=vi
+            base_elements.append(i)
+        else:
+            order.append(i)
+    order.sort(key=lambda i: table_of_elements[i][0]/table_of_elements[i][1], reverse=True)
+    values=[table_of_elements[i][0] for i in order]
+    weights=[table_of_elements[i][1] for i in order]
+    n=len(order)
+    #flooring the fractional part keeps the bound valid only when every value is an integer
+    integral_values=all(isinstance(vi, (int, np.integer)) for vi in values)
+    prefix_values=[0]
+    prefix_weights=[0]
+    for k in range(n):
+        prefix_values.append(prefix_values[-1]+values[k])
+        prefix_weights.append(prefix_weights[-1]+weights[k])
+
+    def greedy_prefix(k, c):
+        #elements k..j-1 fit entirely, element j is the first one that does not
+        return bisect_right(prefix_weights, prefix_weights[k]+c)-1
+
+    def bound(k, c, v):
+        j=greedy_prefix(k, c)
+        b=v+prefix_values[j]-prefix_values[k]
+        if j<n:
+            remaining=c-(prefix_weights[j]-prefix_weights[k])
+            if integral_values:
+                b+=remaining*values[j]//weights[j]
+            else:
+                b+=remaining*values[j]/weights[j]
+        return b
+
+    #chosen elements are kept as a linked list (position, parent) shared between nodes
+    best_value=0
+    best_chosen=None
+    stack=[(0, M, 0, bound(0, M, 0), None)]
+    nodes=0
+    start=timer()
+    while stack:
+        k, c, v, b, chosen=stack.pop()
+        if b<=best_value:
+            continue
+        if (node_budget is not None and nodes>=node_budget) or \
+                (time_budget is not None and nodes%256==0 and timer()-start>=time_budget):
+            stack.append((k, c, v, b, chosen))
+            break
+        nodes+=1
+        j=greedy_prefix(k, c)
+        greedy_value=v+prefix_values[j]-prefix_values[k]
+        if greedy_value>best_value:
+            best_value=greedy_value
+            best_chosen=chosen
+            for position in range(k, j):
+                best_chosen=(position, best_chosen)
+        if j==n:
+            continue
+        #the include branch is pushed last so it is explored first
+        exclude_bound=bound(k+1, c, v)
+        if exclude_bound>best_value:
+            stack.append((k+1, c, v, exclude_bound, chosen))
+        if weights[k]<=c:
+            include_bound=bound(k+1, c-weights[k], v+values[k])
+            if include_bound>best_value:
+                stack.append((k+1, c-weights[k], v+values[k], include_bound, (k, chosen)))
+
+    upper_bound=max([best_value]+[b for _, _, _, b, _ in stack])
+    elements=list(base_elements)
+    while best_chosen is not None:
+        position, best_chosen=best_chosen
+        elements.append(order[position])
+    elements.sort()
+    return BranchAndBoundResult(base_value+best_value, elements, base_value+upper_bound, upper_bound-best_value)
+
+#Hirschberg-style reconstruction: the element range is split in half, the best
+#capacity split is read from a forward and a backward row and both halves are
+#solved independently, so only O(M) cells are alive at any time
+
+def knapsack_problem_elements(M, N, table_of_elements):
+    """O(N*M*log(N)) time, O(M) memory, returns indices of the chosen elements"""
+    elements=[]
+    ranges=[(0, N, M)]
+    while ranges:
+        lo, hi, c=ranges.pop()
+        if hi-lo==1:
+            vi=table_of_elements[lo][0]
+            wi=table_of_elements[lo][1]
+            if wi<=c and vi>0:
+                elements.append(lo)
+            continue
+        if hi-lo<1:
+            continue
+        mid=(lo+hi)//2
+        forward=_knapsack_row(c, table_of_elements[lo:mid])
+        backward=_knapsack_row(c, table_of_elements[mid:hi])
+        k=int(np.argmax(forward+backward[::-1]))
+        del forward, backward
+        ranges.append((mid, hi, c-k))
+        ranges.append((lo, mid, k))
+    elements.sort()
+    return elements
+
+SOLVERS={
+    "dense": knapsack_problem,
+    "vectorized": knapsack_problem_vectorized,
+    "pareto": knapsack_problem_pareto,
+    "branch_and_bound": lambda M, N, table_of_elements: knapsack_problem_branch_and_bound(M, N, table_of_elements).value,
+    "elements": lambda M, N, table_of_elements: sum(table_of_elements[i][0] for i in knapsack_problem_elements(M, N, table_of_elements)),
+}
+
+list_of_capacities=[5, 10, 20, 100, 500, 2000, 5000, 10000]
+list_of_elements=[5, 10, 20, 100, 500, 2000, 5000, 10000]
+
+#The pure-Python dense table is skipped above N*M cells, 10000x10000 would be 10^8 boxed cells per run
+DENSE_MAX_CELLS=5000*5000
+
+#sweep - "elements" (M=100), "capacities" (N=100) or "combined" (N and M grow together)
+#best, median, mean - seconds over the timed repeats
+BenchmarkResult=namedtuple("BenchmarkResult", "solver sweep N M value repeats best median mean")
+
+def get_benchmark_points(solvers, sweeps=("elements", "capacities", "combined"), dense_max_cells=DENSE_MAX_CELLS):
+    points=[]
+    for solver in solvers:
+        if "elements" in sweeps:
+            points.extend((solver, "elements", N, 100) for N in list_of_elements)
+        if "capacities" in sweeps:
+            points.extend((solver, "capacities", 100, M) for M in list_of_capacities)
+        if "combined" in sweeps:
+            points.extend((solver, "combined", N, M) for N, M in zip(list_of_elements, list_of_capacities))
+    return [point for point in points if point[0]!="dense" or point[2]*point[3]<=dense_max_cells]
+
+def benchmark_point(point, repeats=5, warmup=1, seed=0):
+    """Runs in a worker process, every solver sees the same elements for the same (N, M)"""
+    solver, sweep, N, M=point
+    random.seed(f"{seed}-{N}-{M}")
+    table_of_elements=generate_random_elements(N, M)
+    function=SOLVERS[solver]
+    for _ in range(warmup):
+        function(M, N, table_of_elements)
+    times=[]
+    for _ in range(repeats):
+        start=timer()
+        value=function(M, N, table_of_elements)
+        end=timer()
+        times.append(end-start)
+    return BenchmarkResult(solver, sweep, N, M, int(value), repeats, min(times), statistics.median(times),
+                           statistics.fmean(times))
+
+def run_benchmark(solvers=tuple(SOLVERS), sweeps=("elements", "capacities", "combined"), repeats=5, warmup=1,
+                  seed=0, max_workers=None, dense_max_cells=DENSE_MAX_CELLS):
+    """Results come back in the order of get_benchmark_points, whatever the worker finishing order"""
+    points=get_benchmark_points(solvers, sweeps, dense_max_cells)
+    run_point=partial(benchmark_point, repeats=repeats, warmup=warmup, seed=seed)
+    if max_workers==1:
+        return list(map(run_point, points))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(run_point, points))
+
+def save_results(results, name):
+    with open(f"{name}.csv", "w", newline="") as f:
+        w=csv.writer(f)
+        w.writerow(BenchmarkResult._fields)
+        w.writerows(results)
+    with open(f"{name}.json", "w") as f:
+        json.dump([result._asdict() for result in results], f, indent=2)
+
+def plot_graph(results, sweep):
+    """Saves the figure without showing it, so it also works on headless machines"""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import pandas as pd
+    import seaborn as sns
+
+    if sweep=="elements":
         xaxis="Size of the input"
         titlee='Time of performing knapsack problem algorithm depending on size of the input'
         name="diff_sizes.png"
-    else:
+    elif sweep=="capacities":
         xaxis="Capacity of the knapsack"
         titlee='Time of performing knapsack problem algorithm depending on capacity of the knapsack'
         name="diff_capacities.png"
-    data_plot=pd.DataFrame({xaxis:listt, "Time [s]":times})
-    chart = sns.lineplot(x=xaxis, y="Time [s]", data=data_plot, marker='o')
+    else:
+        xaxis="Size of the input and capacity of the knapsack"
+        titlee='Time of performing knapsack problem algorithm depending on size of the input and capacity'
+        name="diff_combined.png"
+    results=[result for result in results if result.sweep==sweep]
+    if not results:
+        return
+    data_plot=pd.DataFrame({
+        xaxis:[result.M if sweep=="capacities" else result.N for result in results],
+        "Time [s]":[result.median for result in results],
+        "Solver":[result.solver for result in results],
+    })
+    plt.figure()
+    chart = sns.lineplot(x=xaxis, y="Time [s]", hue="Solver", data=data_plot, marker='o')
     chart.set_title(titlee, fontdict={'size': 15}, wrap=True)
     plt.yscale('log')
     plt.xscale('log')
     plt.savefig(name)
-    plt.show()
+    plt.close()
 
-list_of_capacities=[5, 10, 20, 100, 500, 2000, 5000, 10000]
-list_of_elements=[5, 10, 20, 100, 500, 2000, 5000, 10000]
-times_diff_capacities=[]
-times_diff_nr_of_elements=[]
-times_combined=[]
-for i in list_of_elements:
-    M=100
-    table_of_elements=generate_random_elements(i, M)
-    start=timer()
-    print(knapsack_problem(M, i, table_of_elements))
-    end=timer()
-    times_diff_nr_of_elements.append(end-start)
+def main():
+    parser=argparse.ArgumentParser(description="Knapsack solvers benchmark")
+    parser.add_argument("--solvers", nargs="+", choices=list(SOLVERS), default=list(SOLVERS))
+    parser.add_argument("--sweeps", nargs="+", choices=["elements", "capacities", "combined"],
+                        default=["elements", "capacities", "combined"])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--dense-max-cells", type=int, default=DENSE_MAX_CELLS,
+                        help="skip the dense solver on points with N*M above this (default %(default)s, "
+                             "the 10000x10000 combined point is about 10^8 Python cells per run)")
+    parser.add_argument("--output", default="knapsack_benchmark")
+    parser.add_argument("--plot", action="store_true")
+    args=parser.parse_args()
 
-for i in list_of_capacities:
-    N=100
-    table_of_elements=generate_random_elements(N, i)
-    start=timer()
-    print(knapsack_problem(i, N, table_of_elements))
-    end=timer()
-    times_diff_capacities.append(end - start)
+    results=run_benchmark(args.solvers, args.sweeps, args.repeats, args.warmup, args.seed, args.workers,
+                          args.dense_max_cells)
+    for result in results:
+        print(result)
+    save_results(results, args.output)
+    if args.plot:
+        for sweep in args.sweeps:
+            plot_graph(results, sweep)
 
-for i in range(7):
-    M=list_of_capacities[i]
-    N=list_of_elements[i]
-    table_of_elements=generate_random_elements(N, M)
-    start=timer()
-    #print(knapsack_problem(M, N, table_of_elements))
-    end=timer()
-    times_combined.append(end-start)
-
-print(times_diff_nr_of_elements)
-print(times_diff_capacities)
-#print(times_combined)
-plot_graph(list_of_elements, times_diff_nr_of_elements, 1)
-plot_graph(list_of_capacities, times_diff_capacities, 2)
+if __name__=="__main__":
+    main()
@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+import Knapsack_problem
+
+
+def test_branch_and_bound_non_integer_values():
+    table_of_elements = [[0.61, 8], [0.39, 2], [6.99, 7], [1.99, 6], [9.04, 8], [8.38, 10], [1.69, 4]]
+    result = Knapsack_problem.knapsack_problem_branch_and_bound(6, 7, table_of_elements)
+    assert result.value == pytest.approx(Knapsack_problem.knapsack_problem(6, 7, table_of_elements))
+    assert result.gap == 0
+
+
+def get_random_instances(count, integral=True):
+    rng = random.Random(0)
+    instances = []
+    for _ in range(count):
+        N = rng.randint(0, 8)
+        M = rng.randint(0, 20)
+        if integral:
+            table_of_elements = [[rng.randint(-5, 30), rng.randint(0, 12)] for _ in range(N)]
+        else:
+            table_of_elements = [[round(rng.uniform(-5, 30), 2), rng.randint(0, 12)] for _ in range(N)]
+        instances.append((M, N, table_of_elements))
+    return instances
+
+
+@pytest.mark.parametrize("integral", [True, False])
+class TestSolversAgainstDense:
+    def test_vectorized(self, integral):
+        for M, N, table_of_elements in get_random_instances(200, integral):
+            assert Knapsack_problem.knapsack_problem_vectorized(M, N, table_of_elements) == pytest.approx(
+                Knapsack_problem.knapsack_problem(M, N, table_of_elements)
+            )
+
+    def test_vectorized_batch(self, integral):
+        for M, N, table_of_elements in get_random_instances(50, integral):
+            capacities = list(range(M + 1))
+            assert Knapsack_problem.knapsack_problem_vectorized(capacities, N, table_of_elements).tolist() == (
+                pytest.approx([Knapsack_problem.knapsack_problem(c, N, table_of_elements) for c in capacities])
+            )
+
+    def test_pareto(self, integral):
+        for M, N, table_of_elements in get_random_instances(200, integral):
+            assert Knapsack_problem.knapsack_problem_pareto(M, N, table_of_elements) == pytest.approx(
+                Knapsack_problem.knapsack_problem(M, N, table_of_elements)
+            )
+
+    def test_branch_and_bound(self, integral):
+        for M, N, table_of_elements in get_random_instances(200, integral):
+            result = Knapsack_problem.knapsack_problem_branch_and_bound(M, N, table_of_elements)
+            assert result.value == pytest.approx(Knapsack_problem.knapsack_problem(M, N, table_of_elements))
+            assert result.gap == pytest.approx(0)
+            assert sum(table_of_elements[i][0] for i in result.elements) == pytest.approx(result.value)
+            assert sum(table_of_elements[i][1] for i in result.elements) <= M
+
+    def test_stopped_branch_and_bound(self, integral):
+        for M, N, table_of_elements in get_random_instances(200, integral):
+            optimum = Knapsack_problem.knapsack_problem(M, N, table_of_elements)
+            result = Knapsack_problem.knapsack_problem_branch_and_bound(M, N, table_of_elements, node_budget=1)
+            assert result.value <= optimum + 1e-9 <= result.upper_bound + 2e-9
+            assert result.gap == pytest.approx(result.upper_bound - result.value)
+            assert sum(table_of_elements[i][0] for i in result.elements) == pytest.approx(result.value)
+            assert sum(table_of_elements[i][1] for i in result.elements) <= M
+
+    def test_elements(self, integral):
+        for M, N, table_of_elements in get_random_instances(200, integral):
+            elements = Knapsack_problem.knapsack_problem_elements(M, N, table_of_elements)
+            assert len(set(elements)) == len(elements)
+            assert sum(table_of_elements[i][1] for i in elements) <= M
+            assert sum(table_of_elements[i][0] for i in elements) == pytest.approx(
+                Knapsack_problem.knapsack_problem(M, N, table_of_elements)
+            )
@@ -1,9 +1,9 @@
-import functools
-from collections import namedtuple
+from collections import deque, namedtuple
 
 import numpy as np
 
-KnapsackItem = namedtuple("KnapsackItem", "value weight")
+# count - number of available copies, None for an unlimited supply
+KnapsackItem = namedtuple("KnapsackItem", "value weight count", defaults=(1,))
 
 knapsack = [
     KnapsackItem(5, 7),
@@ -13,41 +13,132 @@ knapsack = [
 
 
 def solve_knapsack(input_knapsack, max_weight):
+    """O(n * max_weight), 0/1 knapsack table, solution[i][w] uses the first i items"""
     matrix_height = 1 + len(input_knapsack)
     matrix_width = 1 + max_weight
     solution = np.zeros(shape=(matrix_height, matrix_width), dtype=int)
 
     for item_index in range(1, matrix_height):
-        for allowed_weight in range(matrix_width):
-            item = knapsack[item_index - 1]
-            item_taken = False
-            if item.weight <= allowed_weight and item.value > solution[item_index - 1][allowed_weight]:
-                solution[item_index][allowed_weight] = item.value
-                item_taken = True
-            # max of previous
-            solution[item_index][allowed_weight] += max(
-                solution[i][allowed_weight - item_taken * item.weight]
-                for i in range(item_index - 1, -1, -1)
+        item = input_knapsack[item_index - 1]
+        previous_row = solution[item_index - 1]
+        solution[item_index] = previous_row
+        if item.weight <= max_weight:
+            np.maximum(
+                previous_row[item.weight:],
+                previous_row[:matrix_width - item.weight] + item.value,
+                out=solution[item_index][item.weight:]
             )
     return solution
 
 
-print(solve_knapsack(knapsack, 10))
+def _add_unbounded_item(best: list, item: KnapsackItem):
+    """O(max_weight)"""
+    if item.weight == 0:
+        if item.value > 0:
+            raise ValueError("Unlimited item without weight makes the value unbounded.")
+        return
+    for allowed_weight in range(item.weight, len(best)):
+        with_item = best[allowed_weight - item.weight] + item.value
+        if with_item > best[allowed_weight]:
+            best[allowed_weight] = with_item
+
+
+def _add_bounded_item(best: list, item: KnapsackItem, count: int):
+    """O(max_weight), sliding window maximum over every residue class modulo item weight"""
+    if item.weight == 0:
+        if item.value > 0:
+            for allowed_weight in range(len(best)):
+                best[allowed_weight] += count * item.value
+        return
+    count = min(count, (len(best) - 1) // item.weight)
+    if count == 0:
+        return
+
+    previous = best.copy()
+    for residue in range(item.weight):
+        # (copies_index, previous value shifted back by copies_index items), values decreasing
+        window = deque()
+        for copies_index, allowed_weight in enumerate(range(residue, len(best), item.weight)):
+            candidate = previous[allowed_weight] - copies_index * item.value
+            while window and window[-1][1] <= candidate:
+                window.pop()
+            window.append((copies_index, candidate))
+            if window[0][0] < copies_index - count:
+                window.popleft()
+            best[allowed_weight] = window[0][1] + copies_index * item.value
+
+
+def solve_bounded_knapsack(input_knapsack, max_weight):
+    """O(n * max_weight), every item can be taken up to item.count times"""
+    best = [0] * (1 + max_weight)
+    for item in input_knapsack:
+        if item.count is None:
+            _add_unbounded_item(best, item)
+        else:
+            _add_bounded_item(best, item, item.count)
+    return best[max_weight]
+
+
+def solve_unbounded_knapsack(input_knapsack, max_weight):
+    """O(n * max_weight), every item can be taken any number of times"""
+    best = [0] * (1 + max_weight)
+    for item in input_knapsack:
+        _add_unbounded_item(best, item)
+    return best[max_weight]
+
+
+class PossibleWaysCounter:
+    """Counts ordered sequences of steps summing up to a destination, optionally modulo p.
+
+    ways[d] = sum(ways[d - step] for step in possible_steps), the table only grows,
+    so queries not larger than the longest destination seen so far are O(1).
+    """
+
+    def __init__(self, possible_steps, modulo: int | None = None):
+        if any(step <= 0 for step in possible_steps):
+            raise ValueError("Steps must be positive.")
+        self.possible_steps = sorted(set(possible_steps))
+        self.modulo = modulo
+        self.ways = [1 if modulo is None else 1 % modulo]
+
+    def _extend(self, destination: int):
+        """O(destination * len(possible_steps))"""
+        ways = self.ways
+        for current in range(len(ways), destination + 1):
+            number_of_possible_ways = 0
+            for step in self.possible_steps:
+                if step > current:
+                    break
+                number_of_possible_ways += ways[current - step]
+            if self.modulo is not None:
+                number_of_possible_ways %= self.modulo
+            ways.append(number_of_possible_ways)
+
+    def count(self, destination: int) -> int:
+        if destination < 0:
+            return 0
+        self._extend(destination)
+        return self.ways[destination]
+
+    def count_batch(self, destinations) -> list:
+        self._extend(max(destinations, default=0))
+        return [self.ways[destination] if destination >= 0 else 0 for destination in destinations]
+
+
+_possible_ways_counters = {}
 
 
-@functools.lru_cache
 def get_number_of_possible_ways(destination, possible_steps: frozenset):
-    if destination == 0:
-        return 1
+    if possible_steps not in _possible_ways_counters:
+        _possible_ways_counters[possible_steps] = PossibleWaysCounter(possible_steps)
+    return _possible_ways_counters[possible_steps].count(destination)
 
-    number_of_possible_ways = 0
-    for step in possible_steps:
-        if destination - step >= 0:
-            number_of_possible_ways += get_number_of_possible_ways(destination - step, possible_steps)
-    return number_of_possible_ways
 
+if __name__ == "__main__":
+    print(solve_knapsack(knapsack, 10))
+    print(solve_bounded_knapsack(knapsack, 10))
 
-print(get_number_of_possible_ways(
-    10,
-    frozenset({1, 2, 5, 10, 20, 50, 100})
-))
+    print(get_number_of_possible_ways(
+        10,
+        frozenset({1, 2, 5, 10, 20, 50, 100})
+    ))
@@ -0,0 +1,111 @@
+import functools
+import itertools
+import random
+
+import pytest
+
+import dynamic_programming
+from dynamic_programming import KnapsackItem
+
+
+def get_best_value_by_enumeration(items, max_weight, counts):
+    """Every combination of copies, counts[i] - largest number of copies of items[i]"""
+    best = 0
+    for copies in itertools.product(*(range(count + 1) for count in counts)):
+        if sum(n * item.weight for n, item in zip(copies, items)) <= max_weight:
+            best = max(best, sum(n * item.value for n, item in zip(copies, items)))
+    return best
+
+
+def get_random_items(rng, unbounded=False):
+    items = []
+    for _ in range(rng.randint(0, 4)):
+        weight = rng.randint(1 if unbounded else 0, 6)
+        value = rng.randint(-3, 15)
+        count = None if unbounded else rng.choice([0, 1, 2, 3, None])
+        items.append(KnapsackItem(value, weight, count))
+    return items
+
+
+@functools.lru_cache
+def get_number_of_possible_ways_recursively(destination, possible_steps: frozenset):
+    """The original recursive counter"""
+    if destination == 0:
+        return 1
+
+    number_of_possible_ways = 0
+    for step in possible_steps:
+        if destination - step >= 0:
+            number_of_possible_ways += get_number_of_possible_ways_recursively(destination - step, possible_steps)
+    return number_of_possible_ways
+
+
+def test_solve_knapsack_table():
+    rng = random.Random(0)
+    for _ in range(100):
+        items = [KnapsackItem(rng.randint(0, 15), rng.randint(0, 6)) for _ in range(rng.randint(0, 5))]
+        max_weight = rng.randint(0, 12)
+        solution = dynamic_programming.solve_knapsack(items, max_weight)
+        assert solution.shape == (len(items) + 1, max_weight + 1)
+        for item_count in range(len(items) + 1):
+            for allowed_weight in range(max_weight + 1):
+                assert solution[item_count][allowed_weight] == get_best_value_by_enumeration(
+                    items[:item_count], allowed_weight, [1] * item_count
+                )
+
+
+def test_solve_knapsack_example():
+    assert dynamic_programming.solve_knapsack(dynamic_programming.knapsack, 10)[-1].tolist() == [
+        0, 10, 10, 10, 10, 10, 10, 10, 15, 15, 19
+    ]
+
+
+def test_solve_bounded_knapsack():
+    rng = random.Random(1)
+    for _ in range(300):
+        items = get_random_items(rng)
+        max_weight = rng.randint(0, 15)
+        counts = [
+            max_weight // max(item.weight, 1) if item.count is None else item.count
+            for item in items
+        ]
+        if any(item.count is None and item.weight == 0 and item.value > 0 for item in items):
+            with pytest.raises(ValueError):
+                dynamic_programming.solve_bounded_knapsack(items, max_weight)
+            continue
+        assert dynamic_programming.solve_bounded_knapsack(items, max_weight) == get_best_value_by_enumeration(
+            items, max_weight, counts
+        )
+
+
+def test_solve_unbounded_knapsack():
+    rng = random.Random(2)
+    for _ in range(300):
+        items = get_random_items(rng, unbounded=True)
+        max_weight = rng.randint(0, 15)
+        assert dynamic_programming.solve_unbounded_knapsack(items, max_weight) == get_best_value_by_enumeration(
+            items, max_weight, [max_weight // item.weight for item in items]
+        )
+
+
+def test_unbounded_item_without_weight():
+    with pytest.raises(ValueError):
+        dynamic_programming.solve_unbounded_knapsack([KnapsackItem(1, 0)], 5)
+
+
+@pytest.mark.parametrize("modulo", [None, 7, 1_000_000_007])
+def test_possible_ways_counter(modulo):
+    for possible_steps in (frozenset({1, 2}), frozenset({1, 2, 5, 10}), frozenset({3, 7})):
+        counter = dynamic_programming.PossibleWaysCounter(possible_steps, modulo)
+        expected = [get_number_of_possible_ways_recursively(destination, possible_steps) for destination in range(40)]
+        if modulo is not None:
+            expected = [ways % modulo for ways in expected]
+        assert [counter.count(destination) for destination in range(39, -1, -1)] == expected[::-1]
+        assert counter.count_batch([-1, 0, 5, 39]) == [0, expected[0], expected[5], expected[39]]
+
+
+def test_get_number_of_possible_ways():
+    possible_steps = frozenset({1, 2, 5, 10, 20, 50, 100})
+    assert dynamic_programming.get_number_of_possible_ways(10, possible_steps) == (
+        get_number_of_possible_ways_recursively(10, possible_steps)
+    )
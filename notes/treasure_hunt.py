@@ -1,3 +1,10 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "4_graph_cycles"))
+
+from graph_cycles import find_hamiltonian_path  # noqa: E402
+
 graph = {
     1: [2, 7],
     2: [3, 10],
@@ -16,7 +23,7 @@ graph = {
 graph_2 = {
     "A": "BFH",
     "B": "CI",
-    "C:": "DFK",
+    "C": "DFK",
     "D": "AE",
     "E": "FGL",
     "F": "EGH",
@@ -30,23 +37,10 @@ graph_2 = {
 
 
 def hamilton(graph, start_v):
-    size = len(graph)
-    # if None we are -unvisiting- comming back and pop v
-    to_visit = [None, start_v]
-    path = []
-    while (to_visit):
-        v = to_visit.pop()
-        if v:
-            path.append(v)
-            if len(path) == size:
-                break
-            for x in set(graph[v]) - set(path):
-                to_visit.append(None)  # out
-                to_visit.append(x)  # in
-        else:  # if None we are comming back and pop v
-            path.pop()
-    return path
-
-
-for i in range(ord("A"), ord("A") + len(graph_2)):
-    print(chr(i), hamilton(graph, chr(i)))
+    """Path from start_v visiting every vertex of the directed graph once, empty list when there is none"""
+    return find_hamiltonian_path(graph, start_v)
+
+
+if __name__ == "__main__":
+    for vertex in graph_2:
+        print(vertex, hamilton(graph_2, vertex))
@@ -1,35 +1,301 @@
 import csv
 import datetime
+import math
+import multiprocessing
+import os
+import statistics
 import time
 import timeit
 from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 
+import numpy as np
+
+from sorting_algorithms.sorting_test import (
+    CountingSort, HeapSort, InsertionSort, MergeSort, OperationCounts, QuickSort, RadixSort, SortingAlgorithm,
+    TimSort, count_operations
+)
 
 EXPERIMENT_NUMBER = 1_00
 RANGE = list(10 ** i for i in range(1, 5))
 MAX_N = 1_000
 
+# Adaptive timing
+WARMUP_RUNS = 1
+MIN_SAMPLES = 5
+AUTORANGE_MIN_TIME = 0.001  # seconds per sample, faster sorts are looped
+RELATIVE_PRECISION = 0.05  # 95% confidence interval of the median relative to the median
+
+SORTING_ALGORITHMS = {
+    "insertion_sort": InsertionSort,
+    "merge_sort": MergeSort,
+    "tim_sort": TimSort,
+    "quick_sort": QuickSort,
+    "heap_sort": HeapSort,
+    "counting_sort": CountingSort,
+    "radix_sort": RadixSort,
+}
+
 ExperimentResults = namedtuple("ExperimentResults",
-                               "sequence_length experiment_number insertion_sort_time merge_sort_time tim_sort_time")
+                               ["sequence_length", "experiment_number"]
+                               + [f"{name}_time" for name in SORTING_ALGORITHMS]
+                               + [f"{name}_{statistic}" for name in SORTING_ALGORITHMS
+                                  for statistic in ("median", "iqr", "samples")]
+                               + [f"{name}_{operation}" for name in SORTING_ALGORITHMS
+                                  for operation in ("comparisons", "moves", "allocations")])
+
+TimingStatistics = namedtuple("TimingStatistics", "mean median iqr samples")
+
+
+def get_timing_statistics(samples: list) -> TimingStatistics:
+    if len(samples) > 1:
+        first_quartile, _, third_quartile = statistics.quantiles(samples, n=4)
+        iqr = third_quartile - first_quartile
+    else:
+        iqr = 0.0
+    return TimingStatistics(
+        mean=statistics.fmean(samples),
+        median=statistics.median(samples),
+        iqr=iqr,
+        samples=len(samples),
+    )
+
+
+def get_median_confidence_interval_width(samples: list, z: float = 1.96) -> float:
+    """Distribution-free interval from order statistics"""
+    samples = sorted(samples)
+    n = len(samples)
+    lower_rank = max(math.floor((n - z * math.sqrt(n)) / 2), 1)
+    upper_rank = min(math.ceil(1 + (n + z * math.sqrt(n)) / 2), n)
+    return samples[upper_rank - 1] - samples[lower_rank - 1]
+
+
+class CachedInput:
+    """Seeded input generator backed by .npy files, a drop-in for the generate_input_function of Experiment.
+
+    Repetition r of a given sequence length is the same array for every algorithm and every rerun.
+    The cache only pins the data and skips regeneration, every call loads a fresh in-memory copy
+    (a list unless as_list is False), so sorting it never touches the file.
+    """
+
+    def __init__(self, generate_array_function, directory, seed: int = 0, pool_size: int = EXPERIMENT_NUMBER,
+                 as_list: bool = True):
+        self.generate_array_function = generate_array_function
+        self.directory = Path(directory)
+        self.seed = seed
+        self.pool_size = pool_size
+        self.as_list = as_list
+
+    def get_path(self, sequence_length: int, max_n: int, repetition: int) -> Path:
+        return self.directory / (f"{self.generate_array_function.__name__}"
+                                 f"_{sequence_length}_{max_n}_{self.seed}_{repetition}.npy")
+
+    def __call__(self, sequence_length: int, max_n: int, repetition: int = 0):
+        repetition %= self.pool_size
+        path = self.get_path(sequence_length, max_n, repetition)
+        if not path.exists():
+            rng = np.random.default_rng([self.seed, sequence_length, max_n, repetition])
+            array = self.generate_array_function(sequence_length=sequence_length, max_n=max_n, rng=rng)
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # Written aside and renamed, parallel workers never see a partial file
+            temporary_path = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npy")
+            np.save(temporary_path, array)
+            os.replace(temporary_path, path)
+        array = np.load(path)
+        return array.tolist() if self.as_list else array
+
+
+def _generate_input(generate_input_function, sequence_length: int, max_n: int, repetition: int):
+    if isinstance(generate_input_function, CachedInput):
+        return generate_input_function(sequence_length=sequence_length, max_n=max_n, repetition=repetition)
+    return generate_input_function(sequence_length=sequence_length, max_n=max_n)
+
+
+def _time_sorting_sequences(sorting_algorithm: SortingAlgorithm, sequences: list) -> float:
+    """Mean time of sorting every sequence in place"""
+    def sort_all():
+        for sequence in sequences:
+            sorting_algorithm.sequence = sequence
+            sorting_algorithm.sort()
+
+    return timeit.timeit(stmt=sort_all, number=1) / len(sequences)
+
+
+def time_sorting_algorithm(sorting_algorithm: SortingAlgorithm, generate_input_function, sequence_length: int,
+                           max_n: int, number: int = 1, first_repetition: int = 0) -> float:
+    """Mean time of sorting `number` fresh inputs, generating them is not timed"""
+    return _time_sorting_sequences(sorting_algorithm, [
+        _generate_input(generate_input_function, sequence_length, max_n, repetition)
+        for repetition in range(first_repetition, first_repetition + number)
+    ])
+
+
+def _time_sorting_input_pool(sorting_algorithm: SortingAlgorithm, input_pool: list, number: int = 1,
+                             first_repetition: int = 0) -> float:
+    """Like time_sorting_algorithm, but sorts copies of preloaded inputs, repetitions wrap around the pool"""
+    return _time_sorting_sequences(sorting_algorithm, [
+        input_pool[repetition % len(input_pool)].copy()
+        for repetition in range(first_repetition, first_repetition + number)
+    ])
+
+
+def time_sorting_algorithm_adaptively(sorting_algorithm: SortingAlgorithm, generate_input_function,
+                                      sequence_length: int, max_n: int, max_samples: int) -> TimingStatistics:
+    """Warm-up, autorange of the loop count, then sampling until the median is precise enough
+
+    The inputs are generated once per cell (a CachedInput pool, or max_samples plain ones) and copied for every run,
+    so fast sorts are not dominated by input generation.
+    """
+    pool_size = generate_input_function.pool_size if isinstance(generate_input_function, CachedInput) else max_samples
+    input_pool = [
+        _generate_input(generate_input_function, sequence_length, max_n, repetition)
+        for repetition in range(max(pool_size, 1))
+    ]
+
+    for _ in range(WARMUP_RUNS):
+        _time_sorting_input_pool(sorting_algorithm, input_pool)
+
+    number = 1
+    while _time_sorting_input_pool(sorting_algorithm, input_pool, number) * number < AUTORANGE_MIN_TIME:
+        number *= 2
+
+    samples = []
+    while len(samples) < max_samples:
+        samples.append(_time_sorting_input_pool(sorting_algorithm, input_pool, number,
+                                                first_repetition=len(samples) * number))
+        if len(samples) >= MIN_SAMPLES and get_median_confidence_interval_width(
+                samples) <= RELATIVE_PRECISION * statistics.median(samples):
+            break
+    return get_timing_statistics(samples)
+
+
+def time_sorting_algorithm_batch(sorting_algorithm: type[SortingAlgorithm], generate_input_function,
+                                 sequence_length: int, max_n: int, experiment_number: int) -> TimingStatistics:
+    """All repetitions are sorted with one sort_batch call, the mean is per sequence
+
+    The batch is converted to the layout the algorithm sorts directly before the timer starts,
+    so Python sorts are not charged for array-to-list conversions the other modes do not pay.
+    """
+    sequences = sorting_algorithm.prepare_batch([
+        _generate_input(generate_input_function, sequence_length, max_n, repetition)
+        for repetition in range(experiment_number)
+    ])
+    mean_time = timeit.timeit(stmt=lambda: sorting_algorithm.sort_batch(sequences), number=1) / experiment_number
+    return TimingStatistics(mean=mean_time, median=mean_time, iqr=0.0, samples=1)
+
+
+def get_mean_operation_counts(sorting_algorithm: type[SortingAlgorithm], generate_input_function,
+                              sequence_length: int, max_n: int, experiment_number: int) -> OperationCounts | None:
+    """None for algorithms that do not sort by comparisons"""
+    if not sorting_algorithm(sequence=None).is_comparison_sort:
+        return None
+    mean_counts = OperationCounts()
+    for repetition in range(experiment_number):
+        counts = count_operations(
+            sorting_algorithm, _generate_input(generate_input_function, sequence_length, max_n, repetition)
+        )
+        mean_counts.comparisons += counts.comparisons / experiment_number
+        mean_counts.moves += counts.moves / experiment_number
+        mean_counts.allocations += counts.allocations / experiment_number
+    return mean_counts
+
+
+def _get_available_cores() -> list:
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def _pin_worker_to_core(worker_counter):
+    """Process pool initializer, every worker gets its own core where the platform allows it"""
+    with worker_counter.get_lock():
+        worker_index = worker_counter.value
+        worker_counter.value += 1
+    if hasattr(os, "sched_setaffinity"):
+        cores = _get_available_cores()
+        os.sched_setaffinity(0, {cores[worker_index % len(cores)]})
+
+
+def _time_sorting_cell(cell) -> float:
+    """Runs in a worker process, one (sequence length, algorithm, repetition) cell"""
+    generate_input_function, sequence_length, max_n, algorithm_name, repetition = cell
+    return time_sorting_algorithm(SORTING_ALGORITHMS[algorithm_name](sequence=None), generate_input_function,
+                                  sequence_length, max_n, first_repetition=repetition)
+
+
+def _time_sorting_cell_adaptively(cell) -> TimingStatistics:
+    """Runs in a worker process, one (sequence length, algorithm) cell, as many samples as the cell needs"""
+    generate_input_function, sequence_length, max_n, algorithm_name, max_samples = cell
+    return time_sorting_algorithm_adaptively(SORTING_ALGORITHMS[algorithm_name](sequence=None),
+                                             generate_input_function, sequence_length, max_n, max_samples)
+
+
+def _time_sorting_cell_batch(cell) -> TimingStatistics:
+    """Runs in a worker process, one (sequence length, algorithm) cell as a single batch"""
+    generate_input_function, sequence_length, max_n, algorithm_name, experiment_number = cell
+    return time_sorting_algorithm_batch(SORTING_ALGORITHMS[algorithm_name], generate_input_function,
+                                        sequence_length, max_n, experiment_number)
+
+
+def _count_operations_cell(cell) -> OperationCounts | None:
+    """Runs in a worker process, one (sequence length, algorithm) cell"""
+    generate_input_function, sequence_length, max_n, algorithm_name, experiment_number = cell
+    return get_mean_operation_counts(SORTING_ALGORITHMS[algorithm_name], generate_input_function, sequence_length,
+                                     max_n, experiment_number)
+
+
+def _get_experiment_results(sequence_length: int, experiment_number: int, timings: dict,
+                            operation_counts: dict | None = None) -> ExperimentResults:
+    """timings - algorithm name: TimingStatistics, operation_counts - algorithm name: OperationCounts or None"""
+    row = {}
+    for name, timing in timings.items():
+        row[f"{name}_time"] = timing.mean
+        row[f"{name}_median"] = timing.median
+        row[f"{name}_iqr"] = timing.iqr
+        row[f"{name}_samples"] = timing.samples
+        counts = (operation_counts or {}).get(name)
+        row[f"{name}_comparisons"] = counts.comparisons if counts else None
+        row[f"{name}_moves"] = counts.moves if counts else None
+        row[f"{name}_allocations"] = counts.allocations if counts else None
+    return ExperimentResults(sequence_length=sequence_length, experiment_number=experiment_number, **row)
 
 
 class Experiment:
-    def __init__(self, experiment_sequence_length_range, max_n, experiment_number, generate_input_function):
+    def __init__(self, experiment_sequence_length_range, max_n, experiment_number, generate_input_function,
+                 parallel: bool = False, max_workers: int | None = None, adaptive: bool = False,
+                 record_operation_counts: bool = False, batch: bool = False):
+        """adaptive - experiment_number becomes the upper limit of samples per cell
+        batch - all experiment_number inputs of a cell are timed as one sort_batch call, overrides adaptive
+        record_operation_counts - sorts every input once more through the instrumented wrappers, untimed
+        """
         self.experiment_sequence_length_range = experiment_sequence_length_range
         self.max_n = max_n
         self.experiment_number = experiment_number
-        self.generate_input_function = generate_input_function
+        self.generate_input_function = generate_input_function  # or a CachedInput
+        self.parallel = parallel
+        self.max_workers = max_workers
+        self.adaptive = adaptive
+        self.record_operation_counts = record_operation_counts
+        self.batch = batch
 
         self.sequence_length = None
 
     def get_sorting_function_timer(self, sorting_algorithm: SortingAlgorithm):
-        total_mean_time = 0
-        for _ in range(self.experiment_number):
-            sorting_algorithm.sequence = self.generate_input_function(
-                sequence_length=self.sequence_length, max_n=self.max_n
-            )
-            total_mean_time += timeit.timeit(stmt=sorting_algorithm.sort, number=1) / self.experiment_number
-        return total_mean_time
+        return self.get_sorting_function_statistics(sorting_algorithm).mean
+
+    def get_sorting_function_statistics(self, sorting_algorithm: SortingAlgorithm) -> TimingStatistics:
+        if self.batch:
+            return time_sorting_algorithm_batch(type(sorting_algorithm), self.generate_input_function,
+                                                self.sequence_length, self.max_n, self.experiment_number)
+        if self.adaptive:
+            return time_sorting_algorithm_adaptively(sorting_algorithm, self.generate_input_function,
+                                                     self.sequence_length, self.max_n, self.experiment_number)
+        return get_timing_statistics([
+            time_sorting_algorithm(sorting_algorithm, self.generate_input_function, self.sequence_length, self.max_n,
+                                   first_repetition=repetition)
+            for repetition in range(self.experiment_number)
+        ])
 
     def iterate_over_different_sequence_length_results(self) -> ExperimentResults:
         calculations = sum(length ** 2.5 for length in self.experiment_sequence_length_range) * self.experiment_number
@@ -37,21 +303,68 @@ class Experiment:
         print(f"Time estimated: {round(time_estimated, 2)}s")
         start = time.time()
 
-        insertion_sort = InsertionSort(sequence=None)
-        merge_sort = MergeSort(sequence=None)
-        tim_sort = TimSort(sequence=None)
+        if self.parallel:
+            yield from self._iterate_over_different_sequence_length_results_in_parallel()
+            print(f"Time measured: {time.time() - start}s")
+            return
+
+        sorting_algorithms = {name: algorithm(sequence=None) for name, algorithm in SORTING_ALGORITHMS.items()}
 
         for sequence_length in self.experiment_sequence_length_range:
             self.sequence_length = sequence_length
-            yield ExperimentResults(
-                sequence_length=sequence_length,
-                experiment_number=self.experiment_number,
-                insertion_sort_time=self.get_sorting_function_timer(insertion_sort),
-                merge_sort_time=self.get_sorting_function_timer(merge_sort),
-                tim_sort_time=self.get_sorting_function_timer(tim_sort),
-            )
+            timings = {
+                name: self.get_sorting_function_statistics(sorting_algorithm)
+                for name, sorting_algorithm in sorting_algorithms.items()
+            }
+            operation_counts = None
+            if self.record_operation_counts:
+                operation_counts = {
+                    name: get_mean_operation_counts(algorithm, self.generate_input_function, sequence_length,
+                                                    self.max_n, self.experiment_number)
+                    for name, algorithm in SORTING_ALGORITHMS.items()
+                }
+            yield _get_experiment_results(sequence_length, self.experiment_number, timings, operation_counts)
         print(f"Time measured: {time.time() - start}s")
 
+    def _iterate_over_different_sequence_length_results_in_parallel(self) -> ExperimentResults:
+        """Cells are spread over a process pool, rows are still yielded in sequence length order"""
+        max_workers = self.max_workers or len(_get_available_cores())
+        worker_counter = multiprocessing.Value("i", 0)
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_pin_worker_to_core,
+                                 initargs=(worker_counter,)) as executor:
+            if self.batch or self.adaptive:
+                cell_statistics = executor.map(
+                    _time_sorting_cell_batch if self.batch else _time_sorting_cell_adaptively, [
+                        (self.generate_input_function, sequence_length, self.max_n, name, self.experiment_number)
+                        for sequence_length in self.experiment_sequence_length_range
+                        for name in SORTING_ALGORITHMS
+                    ])
+            else:
+                cell_times = executor.map(_time_sorting_cell, [
+                    (self.generate_input_function, sequence_length, self.max_n, name, repetition)
+                    for sequence_length in self.experiment_sequence_length_range
+                    for name in SORTING_ALGORITHMS
+                    for repetition in range(self.experiment_number)
+                ])
+                cell_statistics = (
+                    get_timing_statistics([next(cell_times) for _ in range(self.experiment_number)])
+                    for _ in self.experiment_sequence_length_range
+                    for _ in SORTING_ALGORITHMS
+                )
+            if self.record_operation_counts:
+                cell_counts = executor.map(_count_operations_cell, [
+                    (self.generate_input_function, sequence_length, self.max_n, name, self.experiment_number)
+                    for sequence_length in self.experiment_sequence_length_range
+                    for name in SORTING_ALGORITHMS
+                ])
+
+            for sequence_length in self.experiment_sequence_length_range:
+                timings = {name: next(cell_statistics) for name in SORTING_ALGORITHMS}
+                operation_counts = None
+                if self.record_operation_counts:
+                    operation_counts = {name: next(cell_counts) for name in SORTING_ALGORITHMS}
+                yield _get_experiment_results(sequence_length, self.experiment_number, timings, operation_counts)
+
     def run_and_save_results_in_csv(self, file_name: str):
         today = datetime.datetime.today()
         results = self.iterate_over_different_sequence_length_results()
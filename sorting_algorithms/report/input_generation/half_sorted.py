@@ -1,9 +1,9 @@
 from sorting_algorithms import sorting_test
 import common
 
-sorting.Experiment(
-    experiment_sequence_length_range=sorting.RANGE,
-    max_n=sorting.MAX_N,
+common.Experiment(
+    experiment_sequence_length_range=common.RANGE,
+    max_n=common.MAX_N,
     experiment_number=common.EXPERIMENT_NUMBER,
-    generate_input_function=sorting.get_half_sorted_sequence
+    generate_input_function=common.CachedInput(sorting_test.get_half_sorted_array, "input_cache")
 ).run_and_save_results_in_csv("half_sorted")
@@ -4,6 +4,8 @@ from abc import abstractmethod
 
 from typing import MutableSequence
 
+import numpy as np
+
 
 def get_fully_random_sequence(sequence_length: int, max_n: int):
     return [random.randint(1, max_n) for _ in range(sequence_length)]
@@ -29,10 +31,77 @@ def get_fully_sorted_sequence(sequence_length: int, max_n: int):
     return sorted(get_fully_random_sequence(sequence_length=sequence_length, max_n=max_n))
 
 
+def get_fully_random_array(sequence_length: int, max_n: int, rng: np.random.Generator) -> np.ndarray:
+    return rng.integers(1, max_n, size=sequence_length, endpoint=True)
+
+
+def get_part_sorted_array(sequence_length: int, max_n: int, rng: np.random.Generator) -> np.ndarray:
+    """Same distribution as get_part_sorted_sequence, all segments are sorted with one lexsort"""
+    s = get_fully_random_array(sequence_length=sequence_length, max_n=max_n, rng=rng)
+    if sequence_length == 0:
+        return s
+    number_of_sorts = int(rng.integers(sequence_length))
+    if number_of_sorts == 0:
+        return s
+    step = sequence_length // number_of_sorts
+    starts = np.arange(number_of_sorts) * step
+    ends = rng.integers(starts, np.minimum(starts + step, sequence_length), endpoint=True)
+
+    segment_lengths = ends - starts
+    segment_ids = np.repeat(np.arange(number_of_sorts), segment_lengths)
+    positions = np.arange(segment_lengths.sum()) + np.repeat(starts - (np.cumsum(segment_lengths) - segment_lengths),
+                                                             segment_lengths)
+    segment_values = s[positions]
+    s[positions] = segment_values[np.lexsort((segment_values, segment_ids))]
+    return s
+
+
+def get_half_sorted_array(sequence_length: int, max_n: int, rng: np.random.Generator) -> np.ndarray:
+    random_quarter = get_fully_random_array(sequence_length // 4, max_n, rng)
+    return np.concatenate((random_quarter, np.sort(np.tile(random_quarter, 2)), random_quarter))
+
+
+def get_fully_sorted_array(sequence_length: int, max_n: int, rng: np.random.Generator) -> np.ndarray:
+    return np.sort(get_fully_random_array(sequence_length=sequence_length, max_n=max_n, rng=rng))
+
+
 class SortingAlgorithm:
+    NUMPY_SORT_KIND = None  # kind passed to np.sort by sort_batch, None for a loop over rows
+
     def __init__(self, sequence: MutableSequence | None):
         self.sequence = sequence
 
+    @classmethod
+    def prepare_batch(cls, sequences):
+        """Layout sort_batch sorts without conversions: a list of lists for Python comparison sorts, else an array"""
+        sequences = np.asarray(sequences)
+        if cls.NUMPY_SORT_KIND is None and cls(sequence=None).is_comparison_sort:
+            return sequences.tolist()
+        return sequences
+
+    @classmethod
+    def sort_batch(cls, sequences):
+        """Sorts every row of a 2-D array, in place when sequences already is an array
+
+        Rows of an array are converted to lists and back for Python comparison sorts,
+        a list of lists from prepare_batch is sorted row by row in place instead.
+        """
+        is_comparison_sort = cls(sequence=None).is_comparison_sort
+        if isinstance(sequences, list) and cls.NUMPY_SORT_KIND is None and is_comparison_sort:
+            for row in sequences:
+                cls(row).sort()
+            return sequences
+        sequences = np.asarray(sequences)
+        if cls.NUMPY_SORT_KIND is not None:
+            sequences.sort(axis=1, kind=cls.NUMPY_SORT_KIND)
+            return sequences
+        for row in sequences:
+            if is_comparison_sort:
+                row[...] = cls(row.tolist()).sort()
+            else:
+                cls(row).sort()
+        return sequences
+
     @abstractmethod
     def sort(self) -> MutableSequence:
         seq = self.sequence
@@ -43,6 +112,33 @@ class SortingAlgorithm:
     def is_stable(self) -> bool:
         pass
 
+    @property
+    def is_comparison_sort(self) -> bool:
+        return True
+
+
+def _write_back(seq: MutableSequence, sorted_values: np.ndarray) -> MutableSequence:
+    """Stores sorted_values in seq, in place for both lists and NumPy arrays"""
+    if isinstance(seq, np.ndarray):
+        seq[...] = sorted_values
+    else:
+        seq[:] = sorted_values.tolist()
+    return seq
+
+
+def _as_integer_array(seq: MutableSequence) -> np.ndarray:
+    """No copy for NumPy arrays"""
+    values = np.asarray(seq)
+    if values.size and not np.issubdtype(values.dtype, np.integer):
+        raise TypeError("Only integer sequences can be sorted without comparisons.")
+    return values
+
+
+def _get_offsets(values: np.ndarray) -> tuple[np.ndarray, np.uint64]:
+    """(values - min, min) as uint64, modulo 2^64 arithmetic keeps narrow and negative dtypes from overflowing"""
+    minimum = values.min().astype(np.uint64)
+    return values.ravel().astype(np.uint64) - minimum, minimum
+
 
 class BogoSort(SortingAlgorithm):
     def sort(self) -> MutableSequence:
@@ -92,57 +188,203 @@ class BubbleSort(SortingAlgorithm):
 
 class CountingSort(SortingAlgorithm):
     def sort(self) -> MutableSequence:
+        """O(n + k) for k = max - min + 1"""
         seq = self.sequence
 
+        values = _as_integer_array(seq)
+        if values.size == 0:
+            return seq
+        offsets, minimum = _get_offsets(values)
+        counts = np.bincount(offsets.astype(np.intp))
+        keys = np.arange(len(counts), dtype=np.uint64) + minimum
+        return _write_back(seq, np.repeat(keys.astype(values.dtype), counts))
 
-class QuickSort(SortingAlgorithm):
+    @property
+    def is_stable(self) -> bool:
+        return True
 
-    def sort(self) -> MutableSequence:
-        seq = self.sequence
-        pass
+    @property
+    def is_comparison_sort(self) -> bool:
+        return False
 
 
-class MergeSort(SortingAlgorithm):
+class RadixSort(SortingAlgorithm):
+    DIGIT_BITS = 8
+
     def sort(self) -> MutableSequence:
+        """LSD radix sort, O(n * d) for d = bits(max - min) / DIGIT_BITS passes"""
         seq = self.sequence
 
-        if len(seq) > 1:
-            mid_index = int(len(seq) / 2)
+        values = _as_integer_array(seq)
+        if values.size == 0:
+            return seq
+        keys, minimum = _get_offsets(values)
+        digit_mask = np.uint64((1 << self.DIGIT_BITS) - 1)
+        for shift in range(0, int(keys.max()).bit_length(), self.DIGIT_BITS):
+            digits = ((keys >> np.uint64(shift)) & digit_mask).astype(np.uint8)
+            # Stable argsort of 8-bit digits is a counting-sort scatter done in C
+            keys = keys[np.argsort(digits, kind="stable")]
+        return _write_back(seq, (keys + minimum).astype(values.dtype).reshape(values.shape))
 
-            left = seq[:mid_index]
-            right = seq[mid_index:]
-            # Sorting by recurrence
-            self.__class__(left).sort()
-            self.__class__(right).sort()
+    @property
+    def is_stable(self) -> bool:
+        return True
+
+    @property
+    def is_comparison_sort(self) -> bool:
+        return False
 
-            # Merging
-            left_index = 0
-            right_index = 0
-            sorted_index = 0
 
-            while left_index < len(left) and right_index < len(right):
-                # element from left is merged
-                if left[left_index] <= right[right_index]:
-                    seq[sorted_index] = left[left_index]
-                    left_index += 1
-                # element from right is merged
+INSERTION_SORT_CUTOFF = 16
+
+
+def _insertion_sort(seq: MutableSequence, lo: int, hi: int):
+    """O((hi - lo)^2), O(n) when every element is close to its final position"""
+    for i in range(lo + 1, hi):
+        value = seq[i]
+        j = i
+        while j > lo and seq[j - 1] > value:
+            seq[j] = seq[j - 1]
+            j -= 1
+        seq[j] = value
+
+
+def _sift_down(seq: MutableSequence, lo: int, root: int, heap_size: int):
+    """Max-heap stored in seq[lo:lo + heap_size], root is relative to lo"""
+    while True:
+        child = 2 * root + 1
+        if child >= heap_size:
+            return
+        if child + 1 < heap_size and seq[lo + child] < seq[lo + child + 1]:
+            child += 1
+        if seq[lo + root] < seq[lo + child]:
+            seq[lo + root], seq[lo + child] = seq[lo + child], seq[lo + root]
+            root = child
+        else:
+            return
+
+
+def _heap_sort(seq: MutableSequence, lo: int, hi: int):
+    """O(n log n), in place"""
+    heap_size = hi - lo
+    for root in range(heap_size // 2 - 1, -1, -1):
+        _sift_down(seq, lo, root, heap_size)
+    for heap_end in range(heap_size - 1, 0, -1):
+        seq[lo], seq[lo + heap_end] = seq[lo + heap_end], seq[lo]
+        _sift_down(seq, lo, 0, heap_end)
+
+
+class QuickSort(SortingAlgorithm):
+    def sort(self) -> MutableSequence:
+        """Introsort: median-of-three quicksort, heapsort below the depth limit, insertion sort for small ranges.
+
+        O(n log n) worst case, O(log n) extra memory.
+        """
+        seq = self.sequence
+
+        # (lo, hi, depth_limit), the larger partition is postponed so the stack stays O(log n)
+        stack = [(0, len(seq), 2 * len(seq).bit_length())]
+        while stack:
+            lo, hi, depth_limit = stack.pop()
+            while hi - lo > INSERTION_SORT_CUTOFF:
+                if depth_limit == 0:
+                    _heap_sort(seq, lo, hi)
+                    break
+                depth_limit -= 1
+
+                # Median of three, also leaves sentinels at both ends
+                mid = (lo + hi - 1) // 2
+                if seq[mid] < seq[lo]:
+                    seq[lo], seq[mid] = seq[mid], seq[lo]
+                if seq[hi - 1] < seq[mid]:
+                    seq[mid], seq[hi - 1] = seq[hi - 1], seq[mid]
+                    if seq[mid] < seq[lo]:
+                        seq[lo], seq[mid] = seq[mid], seq[lo]
+                pivot = seq[mid]
+
+                # Hoare partition
+                i = lo - 1
+                j = hi
+                while True:
+                    i += 1
+                    while seq[i] < pivot:
+                        i += 1
+                    j -= 1
+                    while seq[j] > pivot:
+                        j -= 1
+                    if i >= j:
+                        break
+                    seq[i], seq[j] = seq[j], seq[i]
+
+                if j + 1 - lo < hi - j - 1:
+                    stack.append((j + 1, hi, depth_limit))
+                    hi = j + 1
                 else:
-                    seq[sorted_index] = right[right_index]
-                    right_index += 1
-                sorted_index += 1
+                    stack.append((lo, j + 1, depth_limit))
+                    lo = j + 1
 
-            while left_index < len(left):  # when all elements from right are merged
-                seq[sorted_index] = left[left_index]
-                left_index += 1
-                sorted_index += 1
+        # Every element is now at most INSERTION_SORT_CUTOFF positions away from its place
+        _insertion_sort(seq, 0, len(seq))
+        return seq
 
-            while right_index < len(right):  # when all elements from left are merged
-                seq[sorted_index] = right[right_index]
-                right_index += 1
-                sorted_index += 1
+    @property
+    def is_stable(self) -> bool:
+        return False
 
+
+class MergeSort(SortingAlgorithm):
+    def sort(self) -> MutableSequence:
+        """Bottom-up natural merge sort, O(n log r) for r ascending runs, one auxiliary buffer"""
+        seq = self.sequence
+
+        # Boundaries of the ascending runs already present in the input
+        run_starts = [0]
+        for i in range(1, len(seq)):
+            if seq[i] < seq[i - 1]:
+                run_starts.append(i)
+        run_starts.append(len(seq))
+        if len(run_starts) <= 2:
             return seq
 
+        source = seq
+        target = seq.copy()
+        while len(run_starts) > 2:
+            merged_run_starts = []
+            for run_index in range(0, len(run_starts) - 1, 2):
+                left_index = run_starts[run_index]
+                mid_index = run_starts[min(run_index + 1, len(run_starts) - 1)]
+                end_index = run_starts[min(run_index + 2, len(run_starts) - 1)]
+                merged_run_starts.append(left_index)
+
+                # Merging, ties are taken from the left run to keep the sort stable
+                right_index = mid_index
+                sorted_index = left_index
+                while left_index < mid_index and right_index < end_index:
+                    if source[left_index] <= source[right_index]:
+                        target[sorted_index] = source[left_index]
+                        left_index += 1
+                    else:
+                        target[sorted_index] = source[right_index]
+                        right_index += 1
+                    sorted_index += 1
+
+                while left_index < mid_index:  # when all elements from right are merged
+                    target[sorted_index] = source[left_index]
+                    left_index += 1
+                    sorted_index += 1
+
+                while right_index < end_index:  # when all elements from left are merged
+                    target[sorted_index] = source[right_index]
+                    right_index += 1
+                    sorted_index += 1
+            merged_run_starts.append(len(seq))
+            run_starts = merged_run_starts
+            source, target = target, source
+
+        if source is not seq:
+            seq[:] = source
+        return seq
+
     @property
     def is_stable(self) -> bool:
         return True
@@ -152,7 +394,8 @@ class HeapSort(SortingAlgorithm):
     def sort(self) -> MutableSequence:
         seq = self.sequence
 
-        pass
+        _heap_sort(seq, 0, len(seq))
+        return seq
 
     @property
     def is_stable(self) -> bool:
@@ -164,17 +407,122 @@ class ShellSort(SortingAlgorithm):
 
 
 class TimSort(SortingAlgorithm):
+    NUMPY_SORT_KIND = "stable"
+
     def sort(self) -> MutableSequence:
         seq = self.sequence
 
         return sorted(self.sequence)
 
 
+class OperationCounts:
+    def __init__(self):
+        self.comparisons = 0
+        self.moves = 0
+        self.allocations = 0
+
+
+class InstrumentedKey:
+    """Element wrapper counting every comparison made by a sorting algorithm"""
+    __slots__ = ("value", "counts")
+
+    def __init__(self, value, counts: OperationCounts):
+        self.value = value
+        self.counts = counts
+
+    def __lt__(self, other):
+        self.counts.comparisons += 1
+        return self.value < other.value
+
+    def __le__(self, other):
+        self.counts.comparisons += 1
+        return self.value <= other.value
+
+    def __gt__(self, other):
+        self.counts.comparisons += 1
+        return self.value > other.value
+
+    def __ge__(self, other):
+        self.counts.comparisons += 1
+        return self.value >= other.value
+
+    def __eq__(self, other):
+        self.counts.comparisons += 1
+        return self.value == other.value
+
+    def __ne__(self, other):
+        self.counts.comparisons += 1
+        return self.value != other.value
+
+    __hash__ = None
+
+
+class InstrumentedSequence(list):
+    """List counting element writes (moves, a swap is two) and auxiliary copies (allocated elements)"""
+
+    def __init__(self, iterable=(), counts: OperationCounts | None = None):
+        super().__init__(iterable)
+        self.counts = counts if counts is not None else OperationCounts()
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            value = list(value)
+            self.counts.moves += len(value)
+        else:
+            self.counts.moves += 1
+        super().__setitem__(index, value)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            copied = InstrumentedSequence(super().__getitem__(index), self.counts)
+            self.counts.allocations += len(copied)
+            return copied
+        return super().__getitem__(index)
+
+    def copy(self):
+        self.counts.allocations += len(self)
+        return InstrumentedSequence(self, self.counts)
+
+
+def count_operations(sorting_algorithm: type[SortingAlgorithm], sequence) -> OperationCounts:
+    """Sorts an instrumented copy of sequence, the algorithms themselves run unchanged"""
+    counts = OperationCounts()
+    instrumented_sequence = InstrumentedSequence((InstrumentedKey(value, counts) for value in sequence), counts)
+    sorting_algorithm(instrumented_sequence).sort()
+    return counts
+
+
+class _StabilityProbe:
+    """Compared by key only, index tells equal keys apart"""
+
+    def __init__(self, key, index):
+        self.key = key
+        self.index = index
+
+    def __lt__(self, other):
+        return self.key < other.key
+
+    def __le__(self, other):
+        return self.key <= other.key
+
+    def __gt__(self, other):
+        return self.key > other.key
+
+    def __ge__(self, other):
+        return self.key >= other.key
+
+
 class Sorting_Test:
     sorting_functions = [
         BubbleSort,
         InsertionSort,
-        SelectionSort
+        SelectionSort,
+        MergeSort,
+        QuickSort,
+        HeapSort,
+        CountingSort,
+        RadixSort,
+        TimSort,
     ]
 
     def __init__(self, test_sequence_length, test_max_n, tests_number):
@@ -189,5 +537,30 @@ class Sorting_Test:
                 function_sorted = sorting_algorithm(random_sequence.copy()).sort()
                 assert function_sorted == sorted(random_sequence), (sorting_algorithm.__name__, function_sorted)
 
+                probe_algorithm = sorting_algorithm(sequence=None)
+                if probe_algorithm.is_stable and probe_algorithm.is_comparison_sort:
+                    probes = [_StabilityProbe(key, index) for index, key in enumerate(random_sequence)]
+                    probes_sorted = sorting_algorithm(probes).sort()
+                    assert [(probe.key, probe.index) for probe in probes_sorted] == sorted(
+                        (probe.key, probe.index) for probe in probes
+                    ), sorting_algorithm.__name__
+
+                batch = np.array([random_sequence, random_sequence[::-1]])
+                assert sorting_algorithm.sort_batch(batch).tolist() == [sorted(random_sequence)] * 2, (
+                    sorting_algorithm.__name__
+                )
+                prepared_batch = sorting_algorithm.prepare_batch([random_sequence, random_sequence[::-1]])
+                assert np.asarray(sorting_algorithm.sort_batch(prepared_batch)).tolist() == (
+                    [sorted(random_sequence)] * 2
+                ), sorting_algorithm.__name__
+
+        # Offsets from the minimum must not overflow narrow dtypes
+        narrow_sequence = np.array([-100, 100, 0, -50], dtype=np.int8)
+        for sorting_algorithm in (CountingSort, RadixSort):
+            assert sorting_algorithm(narrow_sequence.copy()).sort().tolist() == [-100, -50, 0, 100], (
+                sorting_algorithm.__name__
+            )
+
 
 Sorting_Test(5, 25, 10).test()
+Sorting_Test(100, 25, 10).test()